@@ -0,0 +1,19 @@
+from .workload import generate_events
+from .stages import run, time_stages
+from .geometry import layout_appointments
+from .ingest import compare_ingest
+from .encoding import encode_profiles
+from .payload import compare_payload
+from .feeds import ics_memory, write_ics
+
+__all__ = [
+    "generate_events",
+    "run",
+    "time_stages",
+    "layout_appointments",
+    "compare_ingest",
+    "encode_profiles",
+    "compare_payload",
+    "ics_memory",
+    "write_ics",
+]
@@ -0,0 +1,91 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import List, Optional
+
+from magic_calender.config import CalConfig
+
+from .encoding import encode_profiles
+from .feeds import ics_memory
+from .geometry import layout_appointments
+from .ingest import compare_ingest
+from .payload import compare_payload
+from .stages import SCALES, run
+
+
+def main(argv: Optional[List[str]] = None):
+    "Runs the render benchmarks and writes the timings as json"
+    parser = argparse.ArgumentParser(prog="bench")
+    parser.add_argument("--scales", type=int, nargs="+", default=list(SCALES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--year", type=int)
+    parser.add_argument("--month", type=int)
+    parser.add_argument("--multiday-share", type=float, default=0.1)
+    parser.add_argument("--all-day-share", type=float, default=0.1)
+    parser.add_argument("--summary-length", type=int, nargs=2, default=(5, 40))
+    parser.add_argument("--calendars", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, help="json file, stdout if not given")
+    parser.add_argument(
+        "--geometry",
+        action="store_true",
+        help="only measure the appointment layout for the first scale",
+    )
+    parser.add_argument(
+        "--ingest",
+        action="store_true",
+        help="only compare event parsing against the old Appointment for the first scale",
+    )
+    parser.add_argument(
+        "--encode",
+        action="store_true",
+        help="only compare the encode profiles on a month with the first scale of events",
+    )
+    parser.add_argument(
+        "--payload",
+        action="store_true",
+        help="only compare full and field masked api responses for the first scale",
+    )
+    parser.add_argument(
+        "--ics",
+        action="store_true",
+        help="load one month out of .ics feeds with every scale of events of history",
+    )
+    args = parser.parse_args(argv)
+
+    config = CalConfig()
+    if args.year:
+        config.year = args.year
+    if args.month:
+        config.month = args.month
+    if args.geometry:
+        report = layout_appointments(args.scales[0], args.repeat, config)
+    elif args.ingest:
+        report = compare_ingest(args.scales[0], args.repeat, args.seed)
+    elif args.ics:
+        report = ics_memory(args.scales, config.year, config.month, args.seed)
+    elif args.payload:
+        report = compare_payload(args.scales[0], args.repeat, args.seed)
+    elif args.encode:
+        report = encode_profiles(args.scales[0], args.repeat, config, args.seed)
+    else:
+        report = run(
+            args.scales,
+            args.repeat,
+            config,
+            multiday_share=args.multiday_share,
+            all_day_share=args.all_day_share,
+            summary_length=tuple(args.summary_length),
+            calendars=args.calendars,
+            seed=args.seed,
+        )
+    if args.out:
+        with args.out.open("w") as file:
+            json.dump(report, file, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+import time
+from typing import Any, Dict, Optional
+
+from magic_calender.config import CalConfig
+from magic_calender.encoding import ENCODE_PROFILES, encode_async
+from magic_calender.magic_calender import MagicCalender
+
+from .workload import generate_events
+
+
+def encode_profiles(
+    count: int = 150, repeat: int = 3, config: Optional[CalConfig] = None, seed: int = 0
+) -> Dict[str, Any]:
+    """Encode time and output size of every profile for one drawn month, and
+    how long the drawing thread is held up when encoding off thread."""
+    config = config or CalConfig()
+    cal = MagicCalender(config)
+    cal.load(generate_events(count, config.year, config.month, seed=seed))
+    cal.draw()
+    report: Dict[str, Any] = {
+        "events": count,
+        "canvas": [config.width, config.height],
+        "profiles": {},
+    }
+    for profile in ENCODE_PROFILES:
+        timings, blocked = [], []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            data = cal.to_bytes(profile)
+            timings.append(time.perf_counter() - start)
+            start = time.perf_counter()
+            future = encode_async(cal._img, profile)
+            blocked.append(time.perf_counter() - start)
+            future.result()
+        report["profiles"][profile] = {
+            "encode_s": min(timings),
+            "async_blocked_s": min(blocked),
+            "bytes": len(data),
+        }
+    return report
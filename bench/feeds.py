@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import tempfile
+import time
+from calendar import monthrange
+import tracemalloc
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Sequence
+
+from magic_calender.core.appointment import ingest
+from magic_calender.sources import IcsSource
+
+from .workload import generate_events
+
+SCALES = (1_000, 10_000, 100_000)
+
+
+def _ics_time(name: str, value: Dict[str, str]) -> str:
+    if "date" in value:
+        return f"{name};VALUE=DATE:{value['date'].replace('-', '')}"
+    return f"{name}:{value['dateTime'].replace('-', '').replace(':', '')}"
+
+
+def write_ics(events: Iterable[Dict[str, Any]], path: Path) -> None:
+    "Writes Google shaped events as an iCalendar feed the way exports look"
+    with Path(path).open("w", newline="") as file:
+        file.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:-//bench//magic_calender//EN\r\n")
+        for event in events:
+            file.write(
+                "BEGIN:VEVENT\r\n"
+                f"UID:{event['id']}@bench\r\n"
+                f"{_ics_time('DTSTART', event['start'])}\r\n"
+                f"{_ics_time('DTEND', event['end'])}\r\n"
+                f"SUMMARY:{event['summary']}\r\n"
+                "DESCRIPTION:Exported with attendees and notes that the calender never\r\n"
+                "  draws\\, folded over more than one line like real exports do.\r\n"
+                "ATTENDEE;CN=Someone;PARTSTAT=ACCEPTED:mailto:someone@example.com\r\n"
+                "BEGIN:VALARM\r\nACTION:DISPLAY\r\nTRIGGER:-PT10M\r\nEND:VALARM\r\n"
+                "END:VEVENT\r\n"
+            )
+        file.write("END:VCALENDAR\r\n")
+
+
+def _history(count: int, year: int, month: int, seed: int) -> Iterable[Dict[str, Any]]:
+    "count events spread over the years up to the given month, 100 per month"
+    months = max(1, count // 100)
+    for number in range(months):
+        back = months - 1 - number
+        y, m = divmod(year * 12 + month - 1 - back, 12)
+        for event in generate_events(min(100, count - number * 100), y, m + 1, seed=seed + number):
+            # ids only have to be unique within one generated month
+            yield dict(event, id=f"{y}-{m + 1}-{event['id']}")
+
+
+def ics_memory(
+    scales: Sequence[int] = SCALES, year: int = 2023, month: int = 12, seed: int = 0
+) -> Dict[str, Any]:
+    """Time and peak python memory of loading one month out of ics feeds of
+    growing history, the peak should not grow with the feed."""
+    first = date(year, month, 1)
+    last = first.replace(day=monthrange(year, month)[1])
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory() as directory:
+        for scale in scales:
+            path = Path(directory) / f"feed-{scale}.ics"
+            write_ics(_history(scale, year, month, seed), path)
+            tracemalloc.start()
+            start = time.perf_counter()
+            loaded = sum(1 for _ in ingest(IcsSource(path).events(first, last)))
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results.append(
+                {
+                    "events": scale,
+                    "feed_bytes": path.stat().st_size,
+                    "loaded": loaded,
+                    "seconds": elapsed,
+                    "peak_bytes": peak,
+                }
+            )
+    return {"year": year, "month": month, "results": results}
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+from magic_calender.config import CalConfig
+from magic_calender.core.appointment import Appointment
+from magic_calender.core.box import Box
+from magic_calender.core.day_index import DayIndex
+from magic_calender.core.grid import Grid
+from magic_calender.core.layout import layout_month
+from magic_calender.core.point import Point
+
+from .workload import generate_events
+
+
+@contextmanager
+def _count_geometry(counts: Dict[str, int]):
+    "Counts every Point and Box created inside the block"
+    point_new, box_init = Point.__new__, Box.__init__
+
+    def counted_point(cls, *args, **kwargs):
+        counts["points"] += 1
+        return point_new(cls, *args, **kwargs)
+
+    def counted_box(self, *args, **kwargs):
+        counts["boxes"] += 1
+        box_init(self, *args, **kwargs)
+
+    Point.__new__, Box.__init__ = counted_point, counted_box
+    try:
+        yield
+    finally:
+        Point.__new__, Box.__init__ = point_new, box_init
+
+
+def layout_appointments(
+    count: int = 1_000, repeat: int = 5, config: Optional[CalConfig] = None
+) -> Dict[str, Any]:
+    """Per appointment cost of laying out a month without rasterizing:
+    geometry objects created, peak traced memory and wall time."""
+    config = config or CalConfig()
+    grid = Grid(config)
+    appointments: List[Appointment] = [
+        Appointment(event)
+        for event in generate_events(count, config.year, config.month, multiday_share=0)
+    ]
+    index = DayIndex(appointments, config.year, config.month)
+    days = [(day, 0, index.on_day(day)) for day in range(1, len(index) + 1)]
+
+    def layout():
+        layout_month(config, grid, days)
+
+    layout()  # warms the font and text caches
+    counts = {"points": 0, "boxes": 0}
+    with _count_geometry(counts):
+        layout()
+    tracemalloc.start()
+    layout()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        layout()
+        timings.append(time.perf_counter() - start)
+    return {
+        "appointments": count,
+        "points_per_appointment": counts["points"] / count,
+        "boxes_per_appointment": counts["boxes"] / count,
+        "peak_bytes": peak,
+        "us_per_appointment": min(timings) / count * 1e6,
+    }
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import gc
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+import pytz
+
+from magic_calender.core.appointment import ingest
+
+from .workload import generate_events
+
+
+class LegacyAppointment:
+    "Appointment parsing as it was before ingest, kept as the baseline"
+
+    def __init__(self, gcal_event) -> None:
+        self._gcal_event = gcal_event
+        self.summary = "<error>"
+        self.start = datetime.fromisoformat(
+            gcal_event["start"].get("dateTime", gcal_event["start"].get("date")).rstrip("Z")
+        ).replace(tzinfo=pytz.UTC)
+        self.end = datetime.fromisoformat(
+            str(gcal_event["end"].get("dateTime", gcal_event["end"].get("date"))).rstrip("Z")
+        ).replace(tzinfo=pytz.UTC)
+        self.summary = gcal_event["summary"]
+        self.id = gcal_event["id"]
+
+
+def _legacy(events: List[Any]) -> List[Any]:
+    # list and dict dedupe like MagicCalender.load did
+    cleaned: Dict[str, LegacyAppointment] = {}
+    for event in events:
+        appointment = LegacyAppointment(event)
+        cleaned.setdefault(appointment.id, appointment)
+    return list(cleaned.values())
+
+
+def _ingest(events: List[Any]) -> List[Any]:
+    return list(ingest(events))
+
+
+def _retained_bytes(parse: Callable[[List[Any]], List[Any]], count: int, seed: int) -> float:
+    "Memory still held per appointment once the raw events are dropped"
+    gc.collect()
+    tracemalloc.start()
+    events = generate_events(count, 2023, 12, seed=seed)
+    appointments = parse(events)
+    del events
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del appointments
+    return retained / count
+
+
+def compare_ingest(count: int = 10_000, repeat: int = 3, seed: int = 0) -> Dict[str, Any]:
+    """Parse throughput and retained memory per appointment of the old
+    Appointment class against ingest."""
+    events = generate_events(count, 2023, 12, seed=seed)
+    report: Dict[str, Any] = {"events": count}
+    for name, parse in (("legacy", _legacy), ("ingest", _ingest)):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            parse(events)
+            timings.append(time.perf_counter() - start)
+        report[name] = {
+            "events_per_s": count / min(timings),
+            "bytes_per_appointment": _retained_bytes(parse, count, seed),
+        }
+    return report
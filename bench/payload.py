@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import copy
+import gzip
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+from magic_calender.core.appointment import ingest
+from magic_calender.magic_calender import MagicCalender
+
+from .workload import generate_events
+
+# a recorded events.list page, addresses and ids replaced
+FIXTURE = Path(__file__).parent / "fixtures" / "events_page.json"
+
+
+def parse_mask(mask: str) -> Dict[str, Any]:
+    "Tree of a partial response mask like 'nextPageToken,items(id,start)'"
+
+    def put(tree: Dict[str, Any], name: str, subtree: Dict[str, Any]) -> None:
+        # a/b selects b inside a
+        *parents, leaf = name.split("/")
+        for parent in parents:
+            tree = tree.setdefault(parent, {})
+        tree[leaf] = subtree
+
+    def parse(position: int) -> Tuple[Dict[str, Any], int]:
+        tree: Dict[str, Any] = {}
+        name = ""
+        while position < len(mask):
+            char = mask[position]
+            position += 1
+            if char == "(":
+                subtree, position = parse(position)
+                put(tree, name, subtree)
+                name = ""
+            elif char in ",)":
+                if name:
+                    put(tree, name, {})
+                name = ""
+                if char == ")":
+                    return tree, position
+            else:
+                name += char
+        if name:
+            put(tree, name, {})
+        return tree, position
+
+    return parse(0)[0]
+
+
+def apply_mask(value: Any, tree: Dict[str, Any]) -> Any:
+    "What the api sends back for a mask, lists are masked item by item"
+    if not tree:
+        return value
+    if isinstance(value, list):
+        return [apply_mask(item, tree) for item in value]
+    return {key: apply_mask(value[key], tree[key]) for key in tree if key in value}
+
+
+def recorded_page(count: int, seed: int = 0, year: int = 2023, month: int = 12) -> Dict[str, Any]:
+    """The recorded page with count items, the recorded events cycled with
+    generated ids, times and summaries"""
+    with FIXTURE.open("r") as file:
+        page = json.load(file)
+    recorded = page["items"]
+    items = []
+    for number, event in enumerate(generate_events(count, year, month, seed=seed)):
+        item = copy.deepcopy(recorded[number % len(recorded)])
+        item.update(event)
+        items.append(item)
+    page["items"] = items
+    return page
+
+
+def compare_payload(count: int = 1_000, repeat: int = 3, seed: int = 0) -> Dict[str, Any]:
+    """Payload size, plain and gzipped, and json plus ingest time per 1k events
+    for full event resources against the field mask get_events_api uses."""
+    page = recorded_page(count, seed)
+    mask = MagicCalender.event_fields()
+    report: Dict[str, Any] = {"events": count, "fields": mask}
+    for name, body in (("full", page), ("masked", apply_mask(page, parse_mask(mask)))):
+        raw = json.dumps(body).encode()
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(ingest(json.loads(raw)["items"]))
+            timings.append(time.perf_counter() - start)
+        report[name] = {
+            "bytes_per_1k": len(raw) / count * 1000,
+            "gzip_bytes_per_1k": len(gzip.compress(raw)) / count * 1000,
+            "parse_ms_per_1k": min(timings) / count * 1e6,
+        }
+    return report
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import platform
+import statistics
+import time
+from dataclasses import replace
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import PIL
+
+from magic_calender.base_layer import BASE_LAYERS
+from magic_calender.config import CalConfig
+from magic_calender.core.appointment import Appointment, ingest
+from magic_calender.core.grid import Grid
+from magic_calender.core.text import TEXT_CACHE
+from magic_calender.fonts import FONT_POOL
+from magic_calender.magic_calender import MagicCalender, MagicMonth
+
+from .workload import generate_events
+
+SCALES = (10, 1_000, 50_000)
+STAGES = ("parse", "bucketing", "grid_layout", "draw", "draw_warm", "encode")
+
+
+def _timed(
+    function: Callable[..., Any], repeat: int, setup: Optional[Callable[[], Any]] = None
+) -> Dict[str, Any]:
+    """Runs function repeat times, returns its timings and the last result.
+    setup runs untimed before every run and its result is passed to function"""
+    timings = []
+    for _ in range(repeat):
+        args = (setup(),) if setup else ()
+        start = time.perf_counter()
+        result = function(*args)
+        timings.append(time.perf_counter() - start)
+    return {
+        "min_s": min(timings),
+        "median_s": statistics.median(timings),
+        "runs": repeat,
+        "result": result,
+    }
+
+
+def _parse(events: List[Any]) -> List[Appointment]:
+    # same as MagicCalender.load without building the month
+    return list(ingest(events))
+
+
+def _layout(config: CalConfig) -> Grid:
+    grid = Grid(config)
+    for week in grid._cal:
+        for day in week:
+            if day:
+                grid.get_coords_to_draw(day)
+    return grid
+
+
+def _cold_month(config: CalConfig, grid: Grid, appointments: List[Appointment]) -> MagicMonth:
+    "A month without a layout, with the process wide text, font and layer caches emptied"
+    TEXT_CACHE.clear()
+    FONT_POOL.clear()
+    BASE_LAYERS.clear()
+    MagicMonth._header_sizes.clear()
+    return MagicMonth(config, grid, appointments)
+
+
+def _draw(config: CalConfig, month: MagicMonth) -> MagicCalender:
+    cal = MagicCalender(config)
+    cal.month = month
+    cal.draw()
+    return cal
+
+
+def _encode(cal: MagicCalender) -> int:
+    return len(cal.to_bytes())
+
+
+def time_stages(
+    events: List[Any], config: CalConfig, repeat: int = 3
+) -> Dict[str, Dict[str, Any]]:
+    """Timings of every render stage for one set of events, each stage on its
+    own. draw starts from empty caches, draw_warm redraws the same month."""
+    stages = {}
+    stages["parse"] = _timed(lambda: _parse(events), repeat)
+    appointments = stages["parse"]["result"]
+    stages["grid_layout"] = _timed(lambda: _layout(config), repeat)
+    grid = stages["grid_layout"]["result"]
+    stages["bucketing"] = _timed(lambda: MagicMonth(config, grid, appointments), repeat)
+    month = stages["bucketing"]["result"]
+    stages["draw"] = _timed(
+        lambda cold: _draw(config, cold),
+        repeat,
+        lambda: _cold_month(config, grid, appointments),
+    )
+    stages["draw_warm"] = _timed(lambda: _draw(config, month), repeat)
+    cal = stages["draw_warm"]["result"]
+    stages["encode"] = _timed(lambda: _encode(cal), repeat)
+    for stage in stages.values():
+        del stage["result"]
+    return {name: stages[name] for name in STAGES}
+
+
+def run(
+    scales: Iterable[int] = SCALES,
+    repeat: int = 3,
+    config: Optional[CalConfig] = None,
+    **workload,
+) -> Dict[str, Any]:
+    """Benchmarks every scale with synthetic events, the result is plain json
+    so runs of different releases can be compared."""
+    config = config or CalConfig()
+    results = []
+    for scale in scales:
+        events = generate_events(scale, config.year, config.month, **workload)
+        results.append(
+            {
+                "events": scale,
+                "stages": time_stages(events, replace(config), repeat),
+            }
+        )
+    return {
+        "python": platform.python_version(),
+        "pillow": PIL.__version__,
+        "machine": platform.machine(),
+        "year": config.year,
+        "month": config.month,
+        "repeat": repeat,
+        "workload": workload,
+        "results": results,
+    }
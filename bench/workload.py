@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+import random
+import string
+from calendar import monthrange
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Tuple
+
+
+def _summary(rng: random.Random, length: int) -> str:
+    "Random words cut to exactly length characters"
+    text = ""
+    while len(text) < length:
+        word = "".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 9)))
+        text = f"{text} {word}" if text else word
+    return text[:length].rstrip().ljust(length, "x").capitalize()
+
+
+def generate_events(
+    count: int,
+    year: int,
+    month: int,
+    multiday_share: float = 0.1,
+    all_day_share: float = 0.1,
+    summary_length: Tuple[int, int] = (5, 40),
+    calendars: int = 3,
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    """Google Calendar event payloads spread over the given month.
+
+    multiday_share of the events last 2 to 5 days, all_day_share are single
+    all day events and the rest are timed events within one day. Ids are
+    unique per calendar, the same seed always gives the same events."""
+    rng = random.Random(seed)
+    days = monthrange(year, month)[1]
+    events = []
+    for number in range(count):
+        first = date(year, month, rng.randint(1, days))
+        kind = rng.random()
+        if kind < multiday_share:
+            last = first + timedelta(days=rng.randint(2, 5))
+            start = {"date": first.isoformat()}
+            end = {"date": last.isoformat()}
+        elif kind < multiday_share + all_day_share:
+            start = {"date": first.isoformat()}
+            end = {"date": (first + timedelta(days=1)).isoformat()}
+        else:
+            begin = datetime.combine(first, datetime.min.time()) + timedelta(
+                minutes=15 * rng.randint(0, 80)
+            )
+            finish = begin + timedelta(minutes=15 * rng.randint(1, 12))
+            start = {"dateTime": begin.isoformat() + "Z"}
+            end = {"dateTime": finish.isoformat() + "Z"}
+        events.append(
+            {
+                "id": f"cal{number % calendars}-{number}",
+                "summary": _summary(rng, rng.randint(*summary_length)),
+                "start": start,
+                "end": end,
+            }
+        )
+    return events
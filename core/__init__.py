@@ -1,6 +1,7 @@
 from .point import Point
 from core.box import Box
 from .grid import Grid 
-from .appointment import Appointment
+from .appointment import Appointment, ingest
+from .day_index import DayIndex
 
-__all__ = ["Point", "Box", "Grid", "Appointment"] 
\ No newline at end of file
+__all__ = ["Point", "Box", "Grid", "Appointment", "ingest", "DayIndex"] 
\ No newline at end of file
@@ -1,20 +1,49 @@
-from datetime import datetime, time, timedelta
-from copy import deepcopy
-from typing import Optional
+from datetime import date, datetime, time, timedelta
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
 
 import pytz
 from PIL.ImageDraw import ImageDraw
 from magic_calender.config import CalConfig
+from magic_calender.fonts import FONT_POOL
+from magic_calender.instrument import timed
 
-from core.box import Box
 from core.grid import Grid
+from core.layout import LayoutRow, layout_month
+from core.text import fit_text
+
+# event fields load reads, only these are requested from the api. Features
+# drawing more of an event add theirs here.
+EVENT_FIELDS = {"id", "summary", "start", "end"}
+
+def _parse_time(value: str, tz, parsed: Optional[Dict[str, datetime]] = None) -> datetime:
+    """Timestamp of an event in tz. Offsets are converted, values without one
+    (all day events) are taken as local time in tz."""
+    if parsed is not None and (moment := parsed.get(value)) is not None:
+        return moment
+    moment = datetime.fromisoformat(
+        value[:-1] + "+00:00" if value.endswith("Z") else value
+    )
+    moment = tz.localize(moment) if moment.tzinfo is None else moment.astimezone(tz)
+    if parsed is not None:
+        parsed[value] = moment
+    return moment
+
 
 class Appointment:
+    __slots__ = ("start", "end", "summary", "id")
 
-    def __init__(self, gcal_event) -> None:
-        self._gcal_event = gcal_event
+    def __init__(self, gcal_event, tz=pytz.UTC) -> None:
         self.summary: str = "<error>"
-        self.load()
+        self.load(gcal_event, tz)
+
+    @classmethod
+    def from_event(
+        cls, gcal_event, tz=pytz.UTC, parsed: Optional[Dict[str, datetime]] = None
+    ) -> "Appointment":
+        "Like the constructor, parsed shares timestamps between events"
+        appointment = cls.__new__(cls)
+        appointment.load(gcal_event, tz, parsed)
+        return appointment
 
     def __str__(self) -> str:
         return f"{self.start.isoformat()} - { self.end.isoformat() }: {self.summary}"
@@ -49,89 +78,95 @@ class Appointment:
         #return not self.start.date() == self.end.date() and timedelta(days=1)<(self.end.date()-self.start.date())
         return self.days>1
 
+    @property
+    def sort_key(self) -> Tuple[bool, time]:
+        "Key giving the same order as ``__lt__``, multi day appointments first"
+        return (not self.multiday, time.min if self.multiday else self.end.time())
+
     def on_day(self,day:datetime)->bool:
         return (self.start
             <= day
             < self.end) or day.date() == self.start.date()
 
-    def load(self):
+    def day_span(self) -> Tuple[date, date]:
+        "First and last day for which ``on_day`` holds"
+        last = self.end.date()
+        if self.end.time() == time(0, 0):
+            last -= timedelta(days=1)
+        return self.start.date(), max(self.start.date(), last)
+
+    def load(self, gcal_event, tz=pytz.UTC, parsed: Optional[Dict[str, datetime]] = None):
         try:
-            self.start = datetime.fromisoformat(
-                self._gcal_event["start"]
-                .get("dateTime", self._gcal_event["start"].get("date"))
-                .rstrip("Z")
-            ).replace(tzinfo=pytz.UTC)
-            self.end = datetime.fromisoformat(
-                str(
-                    self._gcal_event["end"].get(
-                        "dateTime", self._gcal_event["end"].get("date")
-                    )
-                ).rstrip("Z")
-            ).replace(tzinfo=pytz.UTC)
-            self.summary = self._gcal_event["summary"]
-            self.id = self._gcal_event["id"]
+            start, end = gcal_event["start"], gcal_event["end"]
+            self.start = _parse_time(start.get("dateTime") or start["date"], tz, parsed)
+            self.end = _parse_time(end.get("dateTime") or end["date"], tz, parsed)
+            self.summary = gcal_event["summary"]
+            self.id = gcal_event["id"]
         except KeyError as exc:
             raise RuntimeError(
-                f"Couldn't load appointment with given data: {self._gcal_event}"
+                f"Couldn't load appointment with given data: {gcal_event}"
             ) from exc
 
+    @property
+    def label(self) -> str:
+        "Summary with the start time in front unless it starts at midnight"
+        return self.summary if self.start.time() == time(0,0) else f"{self.start.strftime("%H:%M")} {self.summary}"
+
     def _get_summary(self, length: int, config: CalConfig) -> str:
-        summary = self.summary if self.start.time() == time(0,0) else f"{self.start.strftime("%H:%M")} {self.summary}"
-
-        if (
-            summary_length := config.font.getlength(str(summary))
-        ) and summary_length <= length:
-            return summary
-        ratio = length / summary_length
-        for i in range(int(len(summary) * ratio)):
-            if (
-                new_sum := summary[: int(len(summary) * ratio) - i] + "\u2026"
-            ) and config.font.getlength(new_sum) <= length:
-                return new_sum
-        return ""
-
-    def _draw_background(self, img: ImageDraw, text_box: Box)->int:
-        box = deepcopy(text_box)
-        box.resize(5)
+        return fit_text(FONT_POOL.get(config.font), self.label, length)
+
+    def _draw_background(self, img: ImageDraw, box: Tuple[int, int, int, int]):
         img.rounded_rectangle(
-            box.as_tuple(), 8, (125, 125, 255, 255),(70, 70, 125, 255)
+            box, 8, (125, 125, 255, 255),(70, 70, 125, 255)
         )
-        return box.height
 
-    def _draw_multi_day(
-        self,
-        config: CalConfig,
-        grid: Grid,
-        img: ImageDraw,
-        offset_y: int = 0,
-        for_day:Optional[int] = None
-    )->int:
-        pass
+    def _draw_multi_day(self, config: CalConfig, img: ImageDraw, layout: LayoutRow) -> int:
+        "Draws one bar across the cells of a week row"
+        if config.draw_background:
+            img.rounded_rectangle(
+                layout.background, 8, (125, 125, 255, 255), (70, 70, 125, 255)
+            )
+        img.text(layout.xy, layout.text, config.line_ink, font=FONT_POOL.get(config.font))
+        return layout.height
 
+    @timed("appointment.draw")
     def draw(
         self,
         config: CalConfig,
         grid: Grid,
         img: ImageDraw,
         offset_y: int = 0,
-        for_day:Optional[int] = None
+        for_day:Optional[int] = None,
+        layout: Optional[LayoutRow] = None,
     ) -> int:
-        coords = grid.get_coords_to_draw(self.start.day if not for_day else for_day, self.days)
-        length_available_for_txt = self.days * (
-            coords.p_end.x - coords.p_start.x - 2 * config.appointment_padding_px
-        )
-        text_shortened = self._get_summary(length_available_for_txt, config)
-        text_box = Box.fromtuple(config.font.getbbox(text_shortened))
-        text_box.anker_to(coords.p_start + (config.appointment_padding_px, offset_y))
-        new_offset = text_box.height
+        "Draws from the month layout row, or lays out just this appointment"
+        if layout is None:
+            day = self.start.day if not for_day else for_day
+            # the layout puts the first appointment one spacing below the offset
+            base = offset_y - config.appointment_spacing_px
+            layout = layout_month(config, grid, [(day, base, [self])], overflow=False).rows(day)[0]
+        if layout.bar:
+            return self._draw_multi_day(config, img, layout)
         if config.draw_background:
-            new_offset = self._draw_background(img, text_box)
+            self._draw_background(img, layout.background)
         img.text(
-            (coords.p_start + (config.appointment_padding_px, offset_y)).as_tuple(),
-            text_shortened,
+            layout.xy,
+            layout.text,
             config.line_ink,
-            font=config.font,
+            font=FONT_POOL.get(config.font),
         )
-        # TODO: what happens when coords.p_start.y + offset-y > coords.p_end.y like too many app to show
-        return new_offset
-
+        return layout.height
+
+
+def ingest(events: Iterable[Any], tz=pytz.UTC) -> Iterator[Appointment]:
+    """Streams appointments from raw events without keeping the events. The
+    first event wins for duplicate ids, later ones are not even parsed."""
+    seen = set()
+    parsed: Dict[str, datetime] = {}
+    for event in events:
+        uid = event.get("id")
+        if uid is not None:
+            if uid in seen:
+                continue
+            seen.add(uid)
+        yield Appointment.from_event(event, tz, parsed)
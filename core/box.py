@@ -6,30 +6,41 @@ from core.point import Point
 from magic_calender.config import CalConfig
 
 class Box:
+    "Immutable, resizing or moving returns a new Box"
+
+    __slots__ = ("p_start", "p_end")
+
     def __init__(self, p_start: Point, p_end: Point) -> None:
         assert p_start < p_end
-        self.p_start: Point = p_start
-        self.p_end: Point = p_end
-        self._p2: Point
-        self._p3: Point
-        self._fill_other()
+        object.__setattr__(self, "p_start", p_start)
+        object.__setattr__(self, "p_end", p_end)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"Box is immutable, can't set {name}")
+
+    def __reduce__(self):
+        return (Box, (self.p_start, self.p_end))
 
-    def _fill_other(self):
-        self._p2 = Point(self.p_end.x, self.p_start.y)
-        self._p3 = Point(self.p_start.x, self.p_end.y)
+    @property
+    def _p2(self) -> Point:
+        return Point(self.p_end.x, self.p_start.y)
+
+    @property
+    def _p3(self) -> Point:
+        return Point(self.p_start.x, self.p_end.y)
 
     def __add__(self, to_add):
         "Adds given pixel outwards in each direction"
-        self.p_start -= to_add
-        self.p_end += to_add
-        self._fill_other()
-        return self
+        return Box(self.p_start - to_add, self.p_end + to_add)
 
     def __eq__(self, other: object) -> bool:
         if isinstance(other, Box):
             return self.p_start == other.p_start and self.p_end == other.p_end
         return False
 
+    def __hash__(self) -> int:
+        return hash((self.p_start, self.p_end))
+
     @classmethod
     def fromtuple(cls, points: Tuple[int, int, int, int]):
         assert len(points) == 4
@@ -48,21 +59,19 @@ class Box:
         return self.p_end - Point(*[i / 2 for i in p.as_tuple()])
 
     @overload
-    def resize(self, other: int) -> None:
+    def resize(self, other: int) -> "Box":
         ...
 
     @overload
-    def resize(self, other: Tuple[int, int, int, int]) -> None:
+    def resize(self, other: Tuple[int, int, int, int]) -> "Box":
         ...
 
     def resize(self, other):
         if isinstance(other, int):
-            self.p_start -= other
-            self.p_end += other
+            return Box(self.p_start - other, self.p_end + other)
         elif isinstance(other, tuple):
             assert len(other) == 4
-            self.p_start += other[:2]
-            self.p_end += other[2:]
+            return Box(self.p_start + other[:2], self.p_end + other[2:])
         else:
             raise NotImplementedError
 
@@ -72,10 +81,8 @@ class Box:
         midpoint = self.midpoint()
         return Box(midpoint - side_length_2, midpoint + side_length_2)
 
-    def anker_to(self, point: Point):
-        self.p_start += point
-        self.p_end += point
-        self._fill_other()
+    def anker_to(self, point: Point) -> "Box":
+        return Box(self.p_start + point, self.p_end + point)
 
     def __sub__(self, other):
         if isinstance(other, Box):
@@ -89,7 +96,7 @@ class Box:
         return f"Box from {self.p_start} to {self.p_end}"
 
     def as_tuple(self) -> Tuple[int, int, int, int]:
-        return self.p_start.as_tuple() + self.p_end.as_tuple()
+        return (self.p_start.x, self.p_start.y, self.p_end.x, self.p_end.y)
 
     def get_rel_box(self, absolute):
         if isinstance((absolute), Box):
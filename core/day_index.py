@@ -0,0 +1,44 @@
+from calendar import monthrange
+from datetime import date
+from typing import Dict, Iterable, List
+
+from core.appointment import Appointment
+
+
+class DayIndex:
+    "Buckets appointments into the days of a month they are shown on"
+
+    def __init__(
+        self, appointments: Iterable[Appointment], year: int, month: int
+    ) -> None:
+        self._first = date(year, month, 1).toordinal()
+        self._last = self._first + monthrange(year, month)[1] - 1
+        intervals = []
+        for pos, app in enumerate(appointments):
+            start, end = (d.toordinal() for d in app.day_span())
+            if end < self._first or start > self._last:
+                continue
+            # position keeps ties in input order, like the stable list.sort() did
+            intervals.append((start, end, app.sort_key + (pos,), app))
+        intervals.sort(key=lambda interval: interval[0])
+        self._days = self._sweep(intervals)
+
+    def _sweep(self, intervals) -> Dict[int, List[Appointment]]:
+        days = {}
+        active = []
+        pending = 0
+        for ordinal in range(self._first, self._last + 1):
+            while pending < len(intervals) and intervals[pending][0] <= ordinal:
+                active.append(intervals[pending])
+                pending += 1
+            active = [interval for interval in active if interval[1] >= ordinal]
+            days[ordinal - self._first + 1] = [
+                interval[3] for interval in sorted(active, key=lambda i: i[2])
+            ]
+        return days
+
+    def __len__(self) -> int:
+        return len(self._days)
+
+    def on_day(self, day: int) -> List[Appointment]:
+        return list(self._days.get(day, ()))
@@ -1,5 +1,6 @@
 
-from typing import Tuple, Optional
+from math import ceil, floor
+from typing import Dict, Iterable, List, Set, Tuple, Optional
 
 
 from enum import Enum
@@ -13,6 +14,10 @@ from magic_calender.core.point import Point
 from magic_calender.config import CalConfig
 
 
+# pseudo cell for everything above the first week row
+HEADER_CELL = (-1, 0)
+
+
 class ORIENTATION(Enum):
     HORIZONTAL = 0
     VERTICAL = 1
@@ -27,54 +32,142 @@ class Grid:
         self._config = CalConfig
         self._cal = monthcalendar(self._config.year, self._config.month)
 
+    @property
+    def _cal(self):
+        return self._month_cal
+
+    @_cal.setter
+    def _cal(self, cal) -> None:
+        self._month_cal = cal
+        self._build_tables()
+
+    def _build_tables(self) -> None:
+        "Precomputes day positions, dimensions and cell boxes of the current month"
+        self._positions: Dict[int, Tuple[int, int]] = {}
+        rows = cols = 0
+        for row, week in enumerate(self._cal):
+            rows = row + 1
+            for col, day in enumerate(week):
+                cols = max(cols, col + 1)
+                # first occurrence wins, like the list comprehension used to
+                self._positions.setdefault(int(day), (row, col))
+        self._dimensions = (rows, cols)
+        self._height_per_row = int(
+            (self._config.height - self._config.header_spacing_px) / rows
+        )
+        self._width_per_col = int(self._config.width / cols)
+        self._cells: Dict[Tuple[int, int], Box] = {
+            (row, col): self._box_from_index(row, col)
+            for row in range(rows)
+            for col in range(cols)
+        }
+        self._spans: Dict[Tuple[int, int], Box] = {}
+
     def _where(self, day: int) -> Tuple[int, int]:
-        return [
-            (row, col)
-            for row, x in enumerate(self._cal)
-            for col, i in enumerate(x)
-            if i == day
-        ][0]
+        return self._positions[day]
 
     def is_weekend(self, day: int):
         _, col = self._where(day)
         return col >= 5
 
     def get_coords_to_draw(self, day: int, multiday:Optional[int]=None) -> Box:
-        row, col = self._where(day)
-        return self._coords_from_index(row, col, multiday)
+        if not multiday:
+            return self._cells[self._where(day)]
+        if (box := self._spans.get((day, multiday))) is None:
+            row, col = self._where(day)
+            box = self._spans[(day, multiday)] = self._box_from_index(
+                row, col, multiday
+            )
+        return box
 
     def _get_dimensions(self) -> Tuple[int, int]:
-        return max(
-            [
-                (row, col)
-                for row, x in enumerate(self._cal, 1)
-                for col, _ in enumerate(x, 1)
-            ]
-        )
+        return self._dimensions
 
     def _coords_from_index(self, row, col, multiday:Optional[int]=None) -> Box:
-        max_rows_to_draw, max_cols_to_draw = self._get_dimensions()
-        height_per_row = int(
-            (self._config.height - self._config.header_spacing_px) / max_rows_to_draw
-        )
-        width_per_col = int(self._config.width / max_cols_to_draw)
+        if not multiday and (box := self._cells.get((row, col))):
+            return box
+        return self._box_from_index(row, col, multiday)
+
+    def _box_from_index(self, row, col, multiday:Optional[int]=None) -> Box:
+        _, max_cols_to_draw = self._dimensions
         p_start = Point(
-            width_per_col * (col),
-            int(self._config.header_spacing_px + (height_per_row * (row))),
+            self._width_per_col * (col),
+            int(self._config.header_spacing_px + (self._height_per_row * (row))),
         )
         days=1
         if multiday and col != max_cols_to_draw:
-            print(f"{multiday},{max_cols_to_draw - col}")
             days=min(multiday, max_cols_to_draw - col)
         p_end = Point(
-            int(p_start.x + days*width_per_col),
-            int(p_start.y + height_per_row),
+            int(p_start.x + days*self._width_per_col),
+            int(p_start.y + self._height_per_row),
         )
         return Box(p_start, p_end)
 
+    def cells_touching(self, bbox: Tuple[int, int, int, int]) -> Set[Tuple[int, int]]:
+        "Cells containing any pixel of bbox, cells share their border pixels"
+        x0, y0, x1, y1 = bbox
+        rows, cols = self._dimensions
+        header = self._config.header_spacing_px
+        cells = set()
+        if y0 < header:
+            cells.add(HEADER_CELL)
+        if y1 >= header:
+            row_start = max(0, ceil(max(0, y0 - header) / self._height_per_row) - 1)
+            row_end = min(rows - 1, floor((y1 - header) / self._height_per_row))
+            col_start = max(0, ceil(max(0, x0) / self._width_per_col) - 1)
+            col_end = min(cols - 1, floor(x1 / self._width_per_col))
+            cells.update(
+                (row, col)
+                for row in range(row_start, row_end + 1)
+                for col in range(col_start, col_end + 1)
+            )
+        return cells
+
+    def cell_area(self, cell: Tuple[int, int]) -> Box:
+        "Pixels owned by a cell, the last row and column reach the canvas edge"
+        rows, cols = self._dimensions
+        if cell == HEADER_CELL:
+            # stops above the top border of the first row
+            return Box(
+                Point(0, 0),
+                Point(self._config.width - 1, self._config.header_spacing_px - 1),
+            )
+        row, col = cell
+        box = self._cells[cell]
+        return Box(
+            box.p_start,
+            Point(
+                self._config.width - 1 if col == cols - 1 else box.p_end.x,
+                self._config.height - 1 if row == rows - 1 else box.p_end.y,
+            ),
+        )
+
+    def merge_cells(self, cells: Iterable[Tuple[int, int]]) -> List[Box]:
+        "Areas of the given cells, merged into one Box per run within a row"
+        boxes = []
+        run_start = previous = None
+        for cell in sorted(cells) + [None]:
+            if (
+                previous is not None
+                and cell is not None
+                and previous != HEADER_CELL
+                and cell[0] == previous[0]
+                and cell[1] == previous[1] + 1
+            ):
+                previous = cell
+                continue
+            if previous is not None:
+                boxes.append(
+                    Box(self.cell_area(run_start).p_start, self.cell_area(previous).p_end)
+                )
+            run_start = previous = cell
+        return boxes
+
+    def draw_cell(self, cell: Tuple[int, int], img: ImageDraw):
+        if self._config.render_grid and cell != HEADER_CELL:
+            self._cells[cell].draw(self._config, img)
+
     def draw(self, img: ImageDraw):
         if self._config.render_grid:
-            rows, cols = self._get_dimensions()
-            for row in range(rows):
-                for col in range(cols):
-                    self._coords_from_index(row, col).draw(self._config, img)
+            for box in self._cells.values():
+                box.draw(self._config, img)
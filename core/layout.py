@@ -0,0 +1,359 @@
+from typing import Any, Dict, Iterable, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from magic_calender.config import CalConfig
+from magic_calender.fonts import FONT_POOL
+
+from core.grid import Grid
+from core.text import fit_text, text_bbox
+
+# pixels the background grows around the text on every side
+BACKGROUND_GROW_PX = 5
+# shown instead of the appointments that don't fit into a cell
+MORE_TEXT = "+{} more"
+
+
+class LayoutRow(NamedTuple):
+    "Where one appointment is drawn on one day"
+
+    offset: int
+    text: str
+    xy: Tuple[int, int]
+    background: Tuple[int, int, int, int]
+    height: int
+    visible: bool
+    # None for the "+N more" marker
+    appointment: Any = None
+    # a multi day bar spanning the cells of one week row
+    bar: bool = False
+
+
+class MonthLayout:
+    """Table of draw rectangles for every appointment shown in a month, one
+    row per appointment and day, rows of a day in drawing order. Multi day
+    bars belong to the first day of each week row they cross."""
+
+    def __init__(
+        self,
+        appointments: List[Any],
+        texts: List[str],
+        offset: np.ndarray,
+        xy: np.ndarray,
+        background: np.ndarray,
+        height: np.ndarray,
+        visible: np.ndarray,
+        slices: Dict[int, slice],
+        bars: Dict[int, List[LayoutRow]],
+        more: Dict[int, LayoutRow],
+        hidden: Dict[int, int],
+    ) -> None:
+        self.appointments = appointments
+        self.texts = texts
+        self.offset = offset
+        self.xy = xy
+        self.background = background
+        self.height = height
+        self.visible = visible
+        self._slices = slices
+        self._bars = bars
+        self._more = more
+        self._hidden = hidden
+
+    def __len__(self) -> int:
+        return (
+            len(self.texts)
+            + sum(len(bars) for bars in self._bars.values())
+            + len(self._more)
+        )
+
+    def hidden(self, day: int) -> int:
+        "Number of appointments of day that didn't fit into its cell"
+        return self._hidden.get(day, 0)
+
+    def rows(self, day: int) -> List[LayoutRow]:
+        rows = list(self._bars.get(day, ()))
+        part = self._slices.get(day)
+        if part is not None:
+            rows += [
+                LayoutRow(offset, text, tuple(xy), tuple(background), height, visible, app)
+                for app, offset, text, xy, background, height, visible in zip(
+                    self.appointments[part],
+                    self.offset[part].tolist(),
+                    self.texts[part],
+                    self.xy[part].tolist(),
+                    self.background[part].tolist(),
+                    self.height[part].tolist(),
+                    self.visible[part].tolist(),
+                )
+            ]
+        if day in self._more:
+            rows.append(self._more[day])
+        return rows
+
+
+def line_pitch(config: CalConfig, font) -> int:
+    """Height reserved per appointment: ascent plus descent is as high as a
+    line of text can get, with the background and spacing around it"""
+    grow = BACKGROUND_GROW_PX if config.draw_background else 0
+    return sum(font.getmetrics()) + 2 * grow + config.appointment_spacing_px
+
+
+def _layout_bars(
+    config: CalConfig,
+    grid: Grid,
+    days: List[Tuple[int, int, Sequence]],
+    font,
+    overflow: bool = True,
+) -> Tuple[Dict[int, List[LayoutRow]], Dict[int, int], Dict[int, int], Dict[int, int]]:
+    """Cuts multi day appointments into one bar per week row and puts every
+    bar of a row into the first lane free over all its cells. With overflow
+    lanes that don't fit into the row are left out, keeping a line free for
+    the "+N more" marker. Returns the bars by the day drawing them, the
+    offset below the lowest lane used in each day, the number of bars left
+    out per day and, for every day a bar crosses, the lines of line_pitch
+    left below its lanes."""
+    segments: Dict[Tuple[int, int], List] = {}
+    base: Dict[int, int] = {}
+    singles: Dict[int, int] = {}
+    for day, base_offset, appointments in days:
+        row, col = grid._where(day)
+        base[day] = base_offset
+        singles[day] = 0
+        for app in appointments:
+            if app.multiday:
+                segment = segments.setdefault((id(app), row), [row, col, col, day, app])
+                segment[2] = col
+            else:
+                singles[day] += 1
+    by_row: Dict[int, List] = {}
+    for order, segment in enumerate(segments.values()):
+        by_row.setdefault(segment[0], []).append(segment + [order])
+
+    spacing = config.appointment_spacing_px
+    padding = config.appointment_padding_px
+    grow = BACKGROUND_GROW_PX if config.draw_background else 0
+    pitch = line_pitch(config, font)
+    bars: Dict[int, List[LayoutRow]] = {}
+    below_lanes: Dict[int, int] = {}
+    hidden: Dict[int, int] = {}
+    lines_left: Dict[int, int] = {}
+    for row, row_segments in by_row.items():
+        row_segments.sort(key=lambda segment: (segment[1], segment[5]))
+        lane_ends: List[int] = []
+        lanes = []
+        for _, first, last, _, _, _ in row_segments:
+            lane = next(
+                (lane for lane, end in enumerate(lane_ends) if end < first),
+                len(lane_ends),
+            )
+            if lane == len(lane_ends):
+                lane_ends.append(last)
+            lane_ends[lane] = last
+            lanes.append(lane)
+        row_days = [day for day in base if grid._where(day)[0] == row]
+        # bars start at the same offset in every cell of the row, so do the
+        # lines counted for them and for the appointments below them
+        row_base = max(base[day] for day in row_days)
+        if overflow:
+            crossing = {
+                day: [
+                    lane
+                    for (_, first, last, _, _, _), lane in zip(row_segments, lanes)
+                    if first <= grid._where(day)[1] <= last
+                ]
+                for day in row_days
+            }
+            crossing = {day: day_lanes for day, day_lanes in crossing.items() if day_lanes}
+            # today's offset comes from the circle and may be a float
+            lines = max(0, int((grid._height_per_row - row_base) // pitch))
+            # a cell that can't show all its lanes, or nothing below them,
+            # needs the last line for the marker
+            reserve = any(
+                max(day_lanes) + 1 > lines or (max(day_lanes) + 1 == lines and singles[day])
+                for day, day_lanes in crossing.items()
+            )
+            fitting = max(0, lines - 1) if reserve else lines
+            for day, day_lanes in crossing.items():
+                shown_lanes = [lane for lane in day_lanes if lane < fitting]
+                if len(shown_lanes) < len(day_lanes):
+                    hidden[day] = hidden.get(day, 0) + len(day_lanes) - len(shown_lanes)
+                lines_left[day] = lines - (max(shown_lanes) + 1 if shown_lanes else 0)
+            shown = [lane < fitting for lane in lanes]
+            row_segments = [s for s, show in zip(row_segments, shown) if show]
+            lanes = [lane for lane, show in zip(lanes, shown) if show]
+            if not row_segments:
+                continue
+        texts = [
+            fit_text(
+                font,
+                app.label,
+                (last - first + 1) * grid._width_per_col - 2 * padding,
+            )
+            for _, first, last, _, app, _ in row_segments
+        ]
+        boxes = [text_bbox(font, text) for text in texts]
+        # all lanes of a row have the same height, bars line up across cells
+        top = min(box[1] for box in boxes)
+        lane_height = max(box[3] for box in boxes) - top + 2 * grow
+        cell_y = config.header_spacing_px + grid._height_per_row * row
+        for (_, first, last, owner, app, _), lane, text in zip(row_segments, lanes, texts):
+            offset = row_base + spacing + lane * (lane_height + spacing)
+            x = grid._width_per_col * first + padding
+            y = cell_y + offset
+            background = (
+                x - grow,
+                y + top - grow,
+                grid._width_per_col * (last + 1) - padding + grow,
+                y + top - grow + lane_height,
+            )
+            bars.setdefault(owner, []).append(
+                LayoutRow(
+                    offset,
+                    text,
+                    (x, y),
+                    background,
+                    lane_height,
+                    background[1] < config.height,
+                    app,
+                    True,
+                )
+            )
+            for day in row_days:
+                if first <= grid._where(day)[1] <= last:
+                    below_lanes[day] = max(
+                        below_lanes.get(day, 0), offset + lane_height
+                    )
+    return bars, below_lanes, hidden, lines_left
+
+
+def layout_month(
+    config: CalConfig,
+    grid: Grid,
+    days: Iterable[Tuple[int, int, Sequence]],
+    overflow: bool = True,
+) -> MonthLayout:
+    """Lays out the appointments of every day at once. days holds (day, offset
+    below the day number, appointments in drawing order). Multi day
+    appointments become bars in lanes at the top of their week rows, the
+    other appointments stack below the lanes used in their cell. For those,
+    cells, stacking and clipping are array operations, only fitting and
+    measuring the text is done per appointment.
+
+    With overflow a cell only gets as many appointments as fit by line_pitch,
+    the rest is replaced by one "+N more" marker and never measured."""
+    days = list(days)
+    font = FONT_POOL.get(config.font)
+    bars, below_lanes, hidden, lines_left = _layout_bars(config, grid, days, font, overflow)
+    pitch = line_pitch(config, font)
+
+    singles, day_numbers, base_offsets, slices, more, marked = [], [], [], {}, {}, set()
+    for day, base_offset, appointments in days:
+        start = len(singles)
+        day_singles = [app for app in appointments if not app.multiday]
+        if overflow:
+            lines = lines_left.get(
+                day, max(0, int((grid._height_per_row - base_offset) // pitch))
+            )
+            if len(day_singles) > lines or hidden.get(day):
+                shown = min(len(day_singles), max(0, lines - 1))
+                more[day] = len(day_singles) - shown + hidden.get(day, 0)
+                day_singles = day_singles[:shown]
+                # a cell too short for a single line doesn't get a marker either
+                if lines:
+                    marked.add(day)
+        base_offset = below_lanes.get(day, base_offset)
+        for app in day_singles:
+            singles.append(app)
+            day_numbers.append(day)
+            base_offsets.append(base_offset)
+        slices[day] = slice(start, len(singles))
+    count = len(singles)
+    day_numbers = np.array(day_numbers, dtype=np.int64).reshape(count)
+    base_offsets = np.array(base_offsets, dtype=np.int64).reshape(count)
+
+    # cell assignment
+    positions = np.zeros((32, 2), dtype=np.int64)
+    for day in slices:
+        positions[day] = grid._where(day)
+    row_of, col_of = positions[day_numbers, 0], positions[day_numbers, 1]
+    cell_x = grid._width_per_col * col_of
+    cell_y = (config.header_spacing_px + grid._height_per_row * row_of).astype(np.int64)
+    available = grid._width_per_col - 2 * config.appointment_padding_px
+
+    texts = [fit_text(font, app.label, available) for app in singles]
+    bbox = np.array(
+        [text_bbox(font, text) for text in texts], dtype=np.int64
+    ).reshape(count, 4)
+
+    grow = BACKGROUND_GROW_PX if config.draw_background else 0
+    height = np.abs(bbox[:, 3] - bbox[:, 1]) + 2 * grow
+
+    # stacking, every appointment starts below the ones before it on that day
+    spacing = config.appointment_spacing_px
+    starts = np.zeros(count, dtype=np.int64)
+    for part in slices.values():
+        starts[part] = part.start
+    before = np.cumsum(height) - height
+    rank = np.arange(count) - starts
+    offset = base_offsets + (rank + 1) * spacing + before - before[starts]
+
+    x = cell_x + config.appointment_padding_px
+    y = cell_y + offset
+    xy = np.stack((x, y), axis=1)
+    background = bbox + np.stack((x, y, x, y), axis=1) + np.array(
+        (-grow, -grow, grow, grow), dtype=np.int64
+    )
+    # whatever starts below the canvas would not show up anyway
+    visible = np.minimum(background[:, 1], bbox[:, 1] + y) < config.height
+    return MonthLayout(
+        singles,
+        texts,
+        offset,
+        xy,
+        background,
+        height,
+        visible,
+        slices,
+        bars,
+        _more_rows(
+            config,
+            grid,
+            font,
+            {day: count for day, count in more.items() if day in marked},
+            slices,
+            below_lanes,
+            days,
+            offset,
+            height,
+        ),
+        more,
+    )
+
+
+def _more_rows(config, grid, font, more, slices, below_lanes, days, offset, height):
+    "The \"+N more\" marker of every day with hidden appointments, below the shown ones"
+    base = {day: below_lanes.get(day, base_offset) for day, base_offset, _ in days}
+    rows = {}
+    for day, count in more.items():
+        part = slices[day]
+        if part.stop > part.start:
+            last = part.stop - 1
+            marker_offset = int(offset[last] + height[last])
+        else:
+            marker_offset = base[day]
+        marker_offset += config.appointment_spacing_px
+        row, col = grid._where(day)
+        x = grid._width_per_col * col + config.appointment_padding_px
+        y = config.header_spacing_px + grid._height_per_row * row + marker_offset
+        text = MORE_TEXT.format(count)
+        x0, y0, x1, y1 = text_bbox(font, text)
+        rows[day] = LayoutRow(
+            marker_offset,
+            text,
+            (x, y),
+            (x0 + x, y0 + y, x1 + x, y1 + y),
+            y1 - y0,
+            y0 + y < config.height,
+        )
+    return rows
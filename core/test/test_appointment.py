@@ -1,9 +1,10 @@
 import json
 from datetime import datetime
 
+import pytest
 import pytz
 
-from lib.appointment import Appointment
+from lib.appointment import Appointment, ingest
 from lib.grid import Grid
 
 def test_magic_appointment_load(example_json):
@@ -55,3 +56,46 @@ def test_magic_appointment_draw(example_json, example_img, example_config):
     grid = Grid(example_config)
     grid.draw(example_img)
     assert 13 == ap.draw(example_config, grid, example_img, 50)
+
+
+def test_appointment_timezones():
+    event = {
+        "id": "call",
+        "summary": "Call",
+        "start": {"dateTime": "2023-12-06T23:30:00-05:00"},
+        "end": {"dateTime": "2023-12-07T00:30:00-05:00"},
+    }
+    ap = Appointment(event)
+    assert ap.start == datetime(2023, 12, 7, 4, 30, tzinfo=pytz.UTC)
+    assert ap.start.tzinfo is pytz.UTC
+    new_york = Appointment(event, pytz.timezone("America/New_York"))
+    assert (new_york.start.day, new_york.start.hour) == (6, 23)
+    assert new_york.start == ap.start
+
+
+def test_appointment_all_day_in_timezone():
+    berlin = pytz.timezone("Europe/Berlin")
+    ap = Appointment(
+        {"id": "d", "summary": "Day", "start": {"date": "2023-07-01"}, "end": {"date": "2023-07-02"}},
+        berlin,
+    )
+    assert ap.start.date() == datetime(2023, 7, 1).date()
+    assert ap.start.utcoffset().total_seconds() == 2 * 3600
+    assert ap.label == "Day"
+
+
+def test_appointment_keeps_no_event(example_json):
+    ap = Appointment(example_json[0])
+    assert not hasattr(ap, "__dict__")
+    assert not hasattr(ap, "_gcal_event")
+
+
+def test_ingest(example_json):
+    events = iter(example_json)
+    appointments = list(ingest(events))
+    assert [a.id for a in appointments] == list(dict.fromkeys(e["id"] for e in example_json))
+    # first one wins for duplicate ids
+    assert appointments[0].summary == "Example event"
+    broken = [{"id": "x", "summary": "no start", "end": {"date": "2023-12-06"}}]
+    with pytest.raises(RuntimeError):
+        list(ingest(broken))
@@ -33,7 +33,16 @@ def test_box_encapsulating_square():
 
 def test_box_resize():
     box = Box.fromtuple((100, 100, 200, 200))
-    box.resize(5)
-    assert box == Box.fromtuple((95, 95, 205, 205)), print(f"{box}")
-    box.resize((5, 5, -5, -5))
-    assert box == Box.fromtuple((100, 100, 200, 200)), print(f"{box}")
\ No newline at end of file
+    bigger = box.resize(5)
+    assert bigger == Box.fromtuple((95, 95, 205, 205)), print(f"{bigger}")
+    assert bigger.resize((5, 5, -5, -5)) == box, print(f"{bigger}")
+    assert box == Box.fromtuple((100, 100, 200, 200))
+
+def test_box_immutable():
+    box = Box.fromtuple((100, 100, 200, 200))
+    with pytest.raises(AttributeError):
+        box.p_start = Point(0, 0)
+    assert box + 5 == Box.fromtuple((95, 95, 205, 205))
+    assert box.anker_to(Point(10, 20)) == Box.fromtuple((110, 120, 210, 220))
+    assert box == Box.fromtuple((100, 100, 200, 200))
+    assert box._p2 == Point(200, 100) and box._p3 == Point(100, 200)
@@ -0,0 +1,53 @@
+from calendar import monthrange
+from datetime import datetime
+
+import pytz
+
+from core.appointment import Appointment
+from core.day_index import DayIndex
+
+
+def _on_day_reference(appointments, year, month, day):
+    apps = [
+        a
+        for a in appointments
+        if a.on_day(datetime(year, month, day, tzinfo=pytz.UTC))
+    ]
+    apps.sort()
+    return apps
+
+
+def _event(uid, start, end):
+    return {"id": uid, "summary": uid, "start": start, "end": end}
+
+
+def test_day_index_matches_on_day(example_json, example_config):
+    appointments = list({Appointment(app) for app in example_json})
+    index = DayIndex(appointments, example_config.year, example_config.month)
+    assert len(index) == 31
+    for day in range(1, 32):
+        assert index.on_day(day) == _on_day_reference(
+            appointments, example_config.year, example_config.month, day
+        )
+
+
+def test_day_index_multi_day_and_month_borders():
+    appointments = [
+        Appointment(_event(*e))
+        for e in [
+            ("before", {"date": "2023-11-28"}, {"date": "2023-12-03"}),
+            ("after", {"date": "2023-12-30"}, {"date": "2024-01-04"}),
+            ("outside", {"date": "2023-11-01"}, {"date": "2023-11-03"}),
+            ("timed", {"dateTime": "2023-12-10T22:00:00Z"}, {"dateTime": "2023-12-12T01:00:00Z"}),
+            ("morning", {"dateTime": "2023-12-10T08:00:00Z"}, {"dateTime": "2023-12-10T09:00:00Z"}),
+            ("evening", {"dateTime": "2023-12-10T18:00:00Z"}, {"dateTime": "2023-12-10T19:00:00Z"}),
+            ("week", {"date": "2023-12-08"}, {"date": "2023-12-15"}),
+            ("week2", {"date": "2023-12-09"}, {"date": "2023-12-13"}),
+        ]
+    ]
+    index = DayIndex(appointments, 2023, 12)
+    for day in range(1, monthrange(2023, 12)[1] + 1):
+        assert index.on_day(day) == _on_day_reference(appointments, 2023, 12, day)
+    assert [a.id for a in index.on_day(1)] == ["before"]
+    assert [a.id for a in index.on_day(31)] == ["after"]
+    assert all(a.id != "outside" for d in range(1, 32) for a in index.on_day(d))
@@ -41,3 +41,11 @@ def test_grid_coords_multiday(example_config, example_img):
 def test_weekend(example_grid):
     assert example_grid.is_weekend(17)
 
+
+def test_grid_tables(example_grid, example_config):
+    rows, cols = example_grid._get_dimensions()
+    for day in range(1, 32):
+        row, col = example_grid._where(day)
+        assert example_grid.get_coords_to_draw(day) == example_grid._box_from_index(row, col)
+    assert example_grid.get_coords_to_draw(6, 3) is example_grid.get_coords_to_draw(6, 3)
+    assert example_grid.get_coords_to_draw(6, 3).width == 3 * int(example_config.width / cols)
@@ -0,0 +1,211 @@
+from core.appointment import Appointment
+from core.box import Box
+from core.day_index import DayIndex
+from core.grid import Grid
+from core.layout import MORE_TEXT, layout_month, line_pitch
+from core.text import TEXT_CACHE, fit_text
+
+
+def _event(uid, start, end, summary=None):
+    return {"id": uid, "summary": summary or uid, "start": start, "end": end}
+
+
+def _reference_rows(config, grid, day, offset, appointments):
+    "One appointment after the other, the way Appointment.draw used to"
+    rows = []
+    for app in appointments:
+        offset += config.appointment_spacing_px
+        coords = grid.get_coords_to_draw(day, app.days)
+        length = app.days * (coords.p_end.x - coords.p_start.x - 2 * config.appointment_padding_px)
+        text = fit_text(config.font, app.label, length)
+        anchor = coords.p_start + (config.appointment_padding_px, offset)
+        background = Box.fromtuple(config.font.getbbox(text)).anker_to(anchor).resize(5)
+        rows.append((offset, text, anchor.as_tuple(), background.as_tuple(), background.height))
+        offset += background.height
+    return rows
+
+
+def test_layout_matches_per_appointment(example_config, example_json):
+    appointments = [Appointment(event) for event in example_json] + [
+        Appointment(_event("late", {"dateTime": "2023-12-08T18:30:00Z"}, {"dateTime": "2023-12-08T19:00:00Z"}, "Dinner with a very long summary that is cut")),
+    ]
+    appointments = [app for app in appointments if not app.multiday]
+    grid = Grid(example_config)
+    index = DayIndex(appointments, example_config.year, example_config.month)
+    days = [(day, 40 + day, index.on_day(day)) for day in range(1, len(index) + 1)]
+    layout = layout_month(example_config, grid, days)
+    assert len(layout) == sum(len(apps) for _, _, apps in days)
+    for day, offset, apps in days:
+        rows = layout.rows(day)
+        assert [row[:5] for row in rows] == _reference_rows(example_config, grid, day, offset, apps)
+        assert all(row.visible for row in rows)
+
+
+def test_layout_without_background(example_config):
+    example_config.draw_background = False
+    app = Appointment(_event("a", {"date": "2023-12-06"}, {"date": "2023-12-07"}, "Text"))
+    (row,) = layout_month(example_config, Grid(example_config), [(6, 0, [app])]).rows(6)
+    x0, y0, x1, y1 = example_config.font.getbbox("Text")
+    assert row.height == y1 - y0
+    assert row.background == (x0 + row.xy[0], y0 + row.xy[1], x1 + row.xy[0], y1 + row.xy[1])
+
+
+def test_layout_clips_below_canvas(example_config):
+    apps = [
+        Appointment(_event(f"a{i}", {"date": "2023-12-28"}, {"date": "2023-12-29"}))
+        for i in range(200)
+    ]
+    rows = layout_month(
+        example_config, Grid(example_config), [(28, 0, apps)], overflow=False
+    ).rows(28)
+    visible = [row.visible for row in rows]
+    assert visible[0] and not visible[-1]
+    assert visible == sorted(visible, reverse=True)
+    first_hidden = rows[visible.index(False)]
+    assert first_hidden.background[1] >= example_config.height
+
+
+def _singles(day, count):
+    return [
+        Appointment(_event(f"a{i}", {"dateTime": f"2023-12-{day:02}T10:00:00Z"}, {"dateTime": f"2023-12-{day:02}T11:00:00Z"}, f"Appointment {i}"))
+        for i in range(count)
+    ]
+
+
+def test_overflow_shows_more_marker(example_config):
+    grid = Grid(example_config)
+    layout = layout_month(example_config, grid, [(6, 40, _singles(6, 200))])
+    rows = layout.rows(6)
+    fitting = (grid._height_per_row - 40) // line_pitch(example_config, example_config.font)
+    assert len(rows) == fitting
+    marker = rows[-1]
+    assert marker.appointment is None and marker.text == MORE_TEXT.format(200 - fitting + 1)
+    assert layout.hidden(6) == 200 - fitting + 1
+    cell = grid.get_coords_to_draw(6)
+    assert all(row.background[3] <= cell.p_end.y for row in rows)
+    assert marker.offset > rows[-2].offset + rows[-2].height
+
+
+def test_overflow_not_needed(example_config):
+    layout = layout_month(example_config, Grid(example_config), [(6, 40, _singles(6, 2))])
+    assert [row.appointment is not None for row in layout.rows(6)] == [True, True]
+    assert layout.hidden(6) == 0
+
+
+def test_overflow_never_measures_hidden(example_config):
+    TEXT_CACHE.clear()
+    layout_month(example_config, Grid(example_config), [(6, 40, _singles(6, 200))])
+    measured = {key[3] for key in TEXT_CACHE._entries}
+    assert "10:00 Appointment 0" in measured
+    assert "10:00 Appointment 199" not in measured
+
+
+def test_overflow_hides_bar_lanes(example_config):
+    grid = Grid(example_config)
+    trips = [
+        Appointment(_event(f"trip{i}", {"date": "2023-12-04"}, {"date": "2023-12-07"}, f"Trip {i}"))
+        for i in range(20)
+    ]
+    layout = layout_month(example_config, grid, [(day, 40, trips) for day in (4, 5, 6)])
+    fitting = (grid._height_per_row - 40) // line_pitch(example_config, example_config.font)
+    assert len([row for row in layout.rows(4) if row.bar]) == fitting - 1
+    for day in (4, 5, 6):
+        assert layout.hidden(day) == 20 - fitting + 1
+        assert layout.rows(day)[-1].text == MORE_TEXT.format(20 - fitting + 1)
+
+
+
+def test_overflow_short_cell_has_no_marker(example_config):
+    example_config.height = example_config.header_spacing_px + 6 * 50
+    grid = Grid(example_config)
+    trip = Appointment(_event("trip", {"date": "2023-12-04"}, {"date": "2023-12-07"}, "Trip"))
+    days = [(4, 40, [trip] + _singles(4, 3)), (5, 40, [trip]), (6, 40, _singles(6, 2))]
+    layout = layout_month(example_config, grid, days)
+    assert grid._height_per_row - 40 < line_pitch(example_config, example_config.font)
+    for day in (4, 5, 6):
+        assert layout.rows(day) == []
+    assert [layout.hidden(day) for day in (4, 5, 6)] == [4, 1, 2]
+
+
+def test_overflow_bars_and_singles_share_lines(example_config):
+    # a tall row, where bars being a little lower than line_pitch adds up
+    example_config.height = example_config.header_spacing_px + 6 * 800
+    grid = Grid(example_config)
+    pitch = line_pitch(example_config, example_config.font)
+    lines = (grid._height_per_row - 60) // pitch
+    trips = [
+        Appointment(_event(f"trip{i}", {"date": "2023-12-04"}, {"date": "2023-12-06"}, f"Trip {i}"))
+        for i in range(lines + 2)
+    ]
+    # the 4th has the larger base, the bars of the whole row start below it
+    days = [(4, 60, trips), (5, 30, trips + _singles(5, 3))]
+    layout = layout_month(example_config, grid, days)
+    assert [row.bar for row in layout.rows(4)] == [True] * (lines - 1) + [False]
+    # the line below the bars is the marker's, the singles are counted in it
+    assert [row.appointment is None for row in layout.rows(5)] == [True]
+    assert layout.hidden(4) == 3
+    assert layout.hidden(5) == 3 + 3
+    for day in (4, 5):
+        cell = grid.get_coords_to_draw(day)
+        bottom = max(row.background[3] for row in layout.rows(4) + layout.rows(day))
+        assert bottom <= cell.p_end.y
+
+def test_empty_layout(example_config):
+    layout = layout_month(example_config, Grid(example_config), [(1, 0, [])])
+    assert len(layout) == 0
+    assert layout.rows(1) == [] and layout.rows(2) == []
+
+
+def _bars(layout, days):
+    return {day: [row for row in layout.rows(day) if row.bar] for day in days}
+
+
+def test_bars_break_at_week_rows(example_config):
+    # December 2023 starts on a Friday, the 11th starts the third row
+    trip = Appointment(_event("trip", {"date": "2023-12-08"}, {"date": "2023-12-13"}, "Trip"))
+    grid = Grid(example_config)
+    days = [(day, 40, [trip]) for day in range(8, 13)]
+    layout = layout_month(example_config, grid, days)
+    bars = _bars(layout, range(8, 13))
+    assert {day: len(rows) for day, rows in bars.items()} == {8: 1, 9: 0, 10: 0, 11: 1, 12: 0}
+    first, second = bars[8][0], bars[11][0]
+    assert first.background[0] < grid.get_coords_to_draw(8).p_start.x + 10
+    assert first.background[2] > grid.get_coords_to_draw(10).p_end.x - 10
+    assert second.background[2] < grid.get_coords_to_draw(13).p_start.x
+    assert first.text == second.text == "Trip"
+    assert len(layout) == 2
+
+
+def test_bars_share_lanes(example_config):
+    grid = Grid(example_config)
+    long = Appointment(_event("long", {"date": "2023-12-04"}, {"date": "2023-12-08"}))
+    overlapping = Appointment(_event("overlap", {"date": "2023-12-06"}, {"date": "2023-12-09"}))
+    later = Appointment(_event("later", {"date": "2023-12-08"}, {"date": "2023-12-10"}))
+    single = Appointment(_event("single", {"dateTime": "2023-12-05T10:00:00Z"}, {"dateTime": "2023-12-05T11:00:00Z"}))
+    free = Appointment(_event("free", {"dateTime": "2023-12-10T10:00:00Z"}, {"dateTime": "2023-12-10T11:00:00Z"}))
+    on_day = {
+        4: [long], 5: [long, single], 6: [long, overlapping], 7: [long, overlapping],
+        8: [overlapping, later], 9: [later], 10: [free],
+    }
+    layout = layout_month(example_config, grid, [(day, 40, apps) for day, apps in on_day.items()])
+    bars = _bars(layout, on_day)
+    lane_0, lane_1 = bars[4][0].offset, bars[6][0].offset
+    assert lane_1 > lane_0 + bars[4][0].height
+    # the bar starting after the first one ended goes back to the top lane
+    assert bars[8][0].offset == lane_0
+    (single_row,) = [row for row in layout.rows(5) if not row.bar]
+    assert single_row.offset == lane_0 + bars[4][0].height + example_config.appointment_spacing_px
+    (free_row,) = layout.rows(10)
+    assert free_row.offset == 40 + example_config.appointment_spacing_px
+
+
+def test_bar_drawn_once_per_segment(example_config, example_img, example_grid):
+    from unittest import mock
+
+    trip = Appointment(_event("trip", {"date": "2023-12-08"}, {"date": "2023-12-13"}, "Trip"))
+    layout = layout_month(example_config, example_grid, [(day, 40, [trip]) for day in range(8, 13)])
+    with mock.patch.object(Appointment, "_draw_multi_day", autospec=True, return_value=0) as bar:
+        for day in range(8, 13):
+            for row in layout.rows(day):
+                row.appointment.draw(example_config, example_grid, example_img, row.offset, day, layout=row)
+    assert bar.call_count == 2
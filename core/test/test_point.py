@@ -17,3 +17,13 @@ def test_add():
 def test_cast():
     y, x = Point(4, 4).as_tuple()
     assert y == x == 4
+
+
+def test_immutable():
+    p = Point(1, 2)
+    with pytest.raises(AttributeError):
+        p.x = 3
+    assert p - (1, 1) == Point(0, 1)
+    assert p - 1 == Point(0, 1)
+    assert p == Point(1, 2)
+    assert {Point(1, 2): "a"}[p] == "a"
@@ -0,0 +1,43 @@
+from core.text import ELLIPSIS, TextFitCache, truncate
+
+
+def _longest_fitting(font, text, width):
+    if font.getlength(text) <= width:
+        return text
+    for i in range(len(text) - 1, 0, -1):
+        if font.getlength(candidate := text[:i] + ELLIPSIS) <= width:
+            return candidate
+    return ""
+
+
+def test_truncate_matches_linear_scan(example_config):
+    font = example_config.font
+    text = "This text should be longer than the space there is for it"
+    for width in (0, 5, 20, 57, 100, 233, font.getlength(text), 1000):
+        assert truncate(font, text, width) == _longest_fitting(font, text, width)
+        assert font.getlength(truncate(font, text, width)) <= width
+    assert truncate(font, "", 10) == ""
+
+
+def test_text_fit_cache(example_config):
+    cache = TextFitCache(maxsize=2)
+    font = example_config.font
+    assert cache.fit(font, "Long Example Event Summary", 60).endswith(ELLIPSIS)
+    cache.fit(font, "Long Example Event Summary", 60)
+    assert (cache.hits, cache.misses) == (1, 1)
+    cache.fit(font.font_variant(size=20), "Long Example Event Summary", 60)
+    cache.fit(font, "Other", 60)
+    assert cache.info() == {"hits": 1, "misses": 3, "size": 2, "maxsize": 2}
+    cache.fit(font, "Long Example Event Summary", 60)
+    assert cache.misses == 4
+
+
+def test_text_bbox_cache(example_config):
+    cache = TextFitCache()
+    font = example_config.font
+    assert cache.bbox(font, "Summary") == font.getbbox("Summary")
+    cache.bbox(font, "Summary")
+    # a fitted text of the same string is a separate entry
+    cache.fit(font, "Summary", 1000)
+    assert cache.info()["size"] == 2
+    assert (cache.hits, cache.misses) == (1, 2)
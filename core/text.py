@@ -0,0 +1,104 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from PIL.ImageFont import FreeTypeFont
+
+from magic_calender.instrument import INSTRUMENT
+
+ELLIPSIS = "\u2026"
+
+
+def truncate(font: FreeTypeFont, text: str, width: float) -> str:
+    "Longest prefix of text, ellipsized if cut, which is at most width wide"
+    measured = 1
+    if font.getlength(text) <= width:
+        INSTRUMENT.count("text_measurements", measured)
+        return text
+    fitting = ""
+    low, high = 1, len(text) - 1
+    while low <= high:
+        mid = (low + high) // 2
+        candidate = text[:mid] + ELLIPSIS
+        measured += 1
+        if font.getlength(candidate) <= width:
+            fitting = candidate
+            low = mid + 1
+        else:
+            high = mid - 1
+    INSTRUMENT.count("text_measurements", measured)
+    return fitting
+
+
+def _measure(font: FreeTypeFont, text: str) -> Tuple[int, int, int, int]:
+    INSTRUMENT.count("text_measurements")
+    return font.getbbox(text)
+
+
+class TextFitCache:
+    """Bounded LRU cache for truncate and getbbox, keyed by font identity,
+    text and width"""
+
+    def __init__(self, maxsize: int = 4096) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def _key(font: FreeTypeFont, text: str, width: Optional[float]) -> Tuple:
+        return (
+            getattr(font, "path", None) or id(font),
+            font.size,
+            getattr(font, "index", 0),
+            text,
+            width,
+        )
+
+    def _cached(self, key: Tuple, compute: Callable[[], Any]) -> Any:
+        with self._lock:
+            if (value := self._entries.get(key)) is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+        value = compute()
+        with self._lock:
+            self._entries[key] = value
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def fit(self, font: FreeTypeFont, text: str, width: float) -> str:
+        return self._cached(
+            self._key(font, text, width), lambda: truncate(font, text, width)
+        )
+
+    def bbox(self, font: FreeTypeFont, text: str) -> Tuple[int, int, int, int]:
+        "font.getbbox(text), the width None keeps it apart from fitted texts"
+        return self._cached(self._key(font, text, None), lambda: _measure(font, text))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def info(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+        }
+
+
+TEXT_CACHE = TextFitCache()
+
+
+def fit_text(font: FreeTypeFont, text: str, width: float) -> str:
+    return TEXT_CACHE.fit(font, text, width)
+
+
+def text_bbox(font: FreeTypeFont, text: str) -> Tuple[int, int, int, int]:
+    return TEXT_CACHE.bbox(font, text)
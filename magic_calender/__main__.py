@@ -1,17 +1,134 @@
-from magic_calender import MagicCalender
-from datetime import date
+import argparse
+import sys
+from datetime import date, datetime
+from pathlib import Path
+from typing import List, Optional
 
+from magic_calender import CalConfig, MagicCalender
+from magic_calender.batch import render_range
+from magic_calender.daemon import RefreshDaemon
+from magic_calender.encoding import ENCODE_PROFILES
+from magic_calender.instrument import INSTRUMENT, JsonFileSink
+from magic_calender.server import make_server
+from magic_calender.sources import source_for
 
-def main():
+
+def _month(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m").date()
+
+
+def main(argv: Optional[List[str]] = None):
     """Draws a calender png based on the config and google calender api.
     """
+    parser = argparse.ArgumentParser(prog="magic_calender")
+    parser.add_argument(
+        "--range",
+        nargs=2,
+        type=_month,
+        metavar=("START", "END"),
+        help="render every month from START to END (YYYY-MM) into --out",
+    )
+    parser.add_argument("--out", type=Path, default=Path.cwd())
+    parser.add_argument("--processes", type=int, help="worker processes for --range")
+    parser.add_argument(
+        "--events",
+        type=Path,
+        help="events from a .ics feed, a .jsonl file or a json dump instead of the api",
+    )
+    parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="keep running and refresh --out/calender.png whenever it changes",
+    )
+    parser.add_argument(
+        "--serve",
+        type=int,
+        metavar="PORT",
+        help="serve /calender.png and /calender.epd over http, rendered on demand",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="address for --serve")
+    parser.add_argument("--interval", type=float, help="seconds between refreshes")
+    parser.add_argument("--jitter", type=float, help="random +- seconds per refresh")
+    parser.add_argument(
+        "--render-cache",
+        type=Path,
+        help="keep renders in this directory and reuse them while nothing changed",
+    )
+    parser.add_argument(
+        "--encoding",
+        choices=list(ENCODE_PROFILES),
+        default="png",
+        help="how the image is written, raw is the bare pixel buffer",
+    )
+    parser.add_argument(
+        "--stdout",
+        action="store_true",
+        help="write this month's image to stdout instead of a file",
+    )
+    parser.add_argument(
+        "--metrics",
+        type=Path,
+        help="append stage timings and counters as json lines to this file",
+    )
+    args = parser.parse_args(argv)
+    if args.metrics:
+        INSTRUMENT.enable(JsonFileSink(args.metrics))
     try:
-        cal = MagicCalender(firstweekday=0)
-        cal.load()
-        cal.draw()
-        cal.save(f"{date.today().isoformat()}.png")
+        config = CalConfig(encode_profile=args.encoding)
+        events = source_for(args.events) if args.events else None
+        if args.range:
+            for path in render_range(
+                *args.range, args.out, config, events=events, processes=args.processes
+            ):
+                print(path)
+            return
+        if args.daemon:
+            config.cache_base_layer = True
+            if args.interval is not None:
+                config.refresh_interval_s = args.interval
+            if args.jitter is not None:
+                config.refresh_jitter_s = args.jitter
+            RefreshDaemon(
+                config,
+                args.out / "calender.png",
+                (lambda: events) if events is not None else None,
+            ).run()
+            return
+        if args.serve is not None:
+            config.cache_base_layer = True
+            server = make_server(
+                config,
+                args.host,
+                args.serve,
+                (lambda: events) if events is not None else None,
+            )
+            print(f"Serving on http://{args.host}:{server.server_address[1]}/calender.png")
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                pass
+            finally:
+                server.server_close()
+            return
+        if args.render_cache:
+            config.cache_dir = args.render_cache
+            config.cache_renders = True
+        cal = MagicCalender(config, firstweekday=0)
+        cal.load(events)
+        if not args.stdout:
+            cal.render(Path(f"{date.today().isoformat()}.png"))
+        elif config.cache_renders:
+            sys.stdout.buffer.write(cal.render().path.read_bytes())
+        else:
+            cal.draw()
+            cal.save(sys.stdout.buffer)
+        sys.stdout.flush()
     except RuntimeError as exc:
         print(f"An error occurred: {exc}")
+    finally:
+        if args.metrics:
+            INSTRUMENT.flush()
+            INSTRUMENT.disable()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import calendar
+import hashlib
+import os
+from collections import OrderedDict
+from pathlib import Path
+from threading import Lock, get_ident
+from typing import Optional
+
+from PIL import Image
+
+from magic_calender.config import CalConfig
+from magic_calender.fonts import font_file
+from magic_calender.render_cache import evict_lru
+
+
+def base_layer_key(config: CalConfig, today: int) -> str:
+    """Digest of everything the grid, header and day numbers are drawn from.
+    today is the day whose number is left out of the layer."""
+    font = config.font
+    fields = (
+        config.year,
+        config.month,
+        config.width,
+        config.height,
+        config.header_spacing_px,
+        tuple(config.line_ink) if isinstance(config.line_ink, (list, tuple)) else config.line_ink,
+        config.line_width,
+        config.render_grid,
+        config.number_size,
+        # id() only keys the in-memory layers, see layer_dir
+        str(font_file(font) or id(font)),
+        font.size,
+        getattr(font, "index", 0),
+        calendar.firstweekday(),
+        today,
+    )
+    return hashlib.sha256(repr(fields).encode()).hexdigest()
+
+
+def layer_dir(config: CalConfig) -> Optional[Path]:
+    "Where layers of config are kept on disk, only for fonts loaded from a file"
+    return config.cache_dir if font_file(config.font) else None
+
+
+class BaseLayerCache:
+    "Rendered static layers in memory, and on disk when a cache dir is given"
+
+    def __init__(self, maxsize: int = 4) -> None:
+        self.maxsize = maxsize
+        self._layers: OrderedDict = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def _path(key: str, cache_dir: Path) -> Path:
+        return Path(cache_dir) / f"base-{key}.png"
+
+    def get(self, key: str, cache_dir: Optional[Path] = None) -> Optional[Image.Image]:
+        with self._lock:
+            if (layer := self._layers.get(key)) is not None:
+                self._layers.move_to_end(key)
+                return layer
+        if cache_dir and (path := self._path(key, cache_dir)).is_file():
+            try:
+                with Image.open(path) as file:
+                    layer = file.convert("RGBA")
+                # the modification time is the last use, for eviction
+                os.utime(path)
+            except (OSError, SyntaxError, ValueError):
+                # unreadable or cut short, drawn again and written over
+                return None
+            self._remember(key, layer)
+            return layer
+        return None
+
+    def put(
+        self,
+        key: str,
+        layer: Image.Image,
+        cache_dir: Optional[Path] = None,
+        max_bytes: Optional[int] = None,
+    ) -> None:
+        """Keeps layer in memory and in cache_dir. There the least recently
+        used layers are removed once they take more than max_bytes."""
+        self._remember(key, layer)
+        if cache_dir:
+            path = self._path(key, cache_dir)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # batch workers and the daemon share the cache dir, never show
+            # them a half written layer
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{get_ident()}.tmp")
+            layer.save(tmp_path, "PNG")
+            os.replace(tmp_path, path)
+            if max_bytes is not None:
+                evict_lru(Path(cache_dir), "base-*.png", max_bytes, keep=path)
+
+    def _remember(self, key: str, layer: Image.Image) -> None:
+        with self._lock:
+            self._layers[key] = layer
+            if len(self._layers) > self.maxsize:
+                self._layers.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._layers.clear()
+
+
+BASE_LAYERS = BaseLayerCache()
@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import replace
+from calendar import monthrange
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import pytz
+
+from magic_calender.config import CalConfig
+from magic_calender.core.appointment import Appointment
+from magic_calender.magic_calender import MagicCalender
+from magic_calender.sources import EventSource
+
+
+def months_between(start: date, end: date) -> List[Tuple[int, int]]:
+    "(year, month) of every month from start to end, both included"
+    months = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        months.append((year, month))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def split_by_month(
+    events: Iterable[Any], months: List[Tuple[int, int]], timezone: str = "UTC"
+) -> Dict[Tuple[int, int], List[Any]]:
+    "Raw events of each month, an event shows up in every month it touches"
+    buckets: Dict[Tuple[int, int], List[Any]] = {month: [] for month in months}
+    tz = pytz.timezone(timezone)
+    for event in events:
+        first, last = Appointment(event, tz).day_span()
+        for month in months_between(first, last):
+            if month in buckets:
+                buckets[month].append(event)
+    return buckets
+
+
+def render_month(config: CalConfig, events: List[Any], path: Path) -> Path:
+    "Renders one month to a PNG, this is what every worker process runs"
+    cal = MagicCalender(config)
+    cal.load(events)
+    cal.draw()
+    cal.save(path)
+    return path
+
+
+def render_range(
+    start: date,
+    end: date,
+    out_dir: Path,
+    config: Optional[CalConfig] = None,
+    events: Union[None, EventSource, Iterable[Any]] = None,
+    processes: Optional[int] = None,
+) -> Iterator[Path]:
+    """Renders every month from start to end on a process pool and yields the
+    PNG paths as they are written. Events are fetched once for the range
+    unless given."""
+    config = config or CalConfig()
+    months = months_between(start, end)
+    if events is None:
+        first = replace(config, year=months[0][0], month=months[0][1])
+        events = MagicCalender(first).get_events_api(
+            *MagicCalender.month_range(*months[0], *months[-1])
+        )
+    elif isinstance(events, EventSource):
+        last_day = monthrange(*months[-1])[1]
+        events = events.events(date(*months[0], 1), date(*months[-1], last_day))
+    buckets = split_by_month(events, months, config.timezone)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=processes or os.cpu_count()) as pool:
+        futures = [
+            pool.submit(
+                render_month,
+                replace(config, year=year, month=month),
+                buckets[(year, month)],
+                out_dir / f"{year}-{month:02}.png",
+            )
+            for year, month in months
+        ]
+        for future in as_completed(futures):
+            yield future.result()
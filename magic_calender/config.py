@@ -2,17 +2,50 @@ from __future__ import annotations
 import os
 import json
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import date
-from typing import Any
+from functools import lru_cache
+from typing import Any, Optional
 from pathlib import Path
 
 from PIL import ImageFont
 
+
+@lru_cache(maxsize=None)
+def default_font() -> ImageFont.FreeTypeFont:
+    "The font used when none is configured, loaded once on first use"
+    return ImageFont.truetype(
+        "arial.ttf"
+        if "nt" in os.name.lower()
+        else "/usr/share/fonts/truetype/dejavu/DejaVuSerif.ttf",
+        12,
+    )
+
+
+class _LazyFont:
+    """Dataclass field default that loads the default font the first time it
+    is read instead of when the module is imported."""
+
+    def __set_name__(self, owner, name: str) -> None:
+        self._name = "_" + name
+
+    def __get__(self, obj, objtype=None):
+        if obj is None:
+            # dataclass asks the class for the default
+            return self
+        font = obj.__dict__.get(self._name)
+        if font is None:
+            font = obj.__dict__[self._name] = default_font()
+        return font
+
+    def __set__(self, obj, value) -> None:
+        obj.__dict__[self._name] = None if value is self else value
+
+
 @dataclass
 class CalConfig:
-    month: int = date.today().month
-    year: int = date.today().year
+    month: int = field(default_factory=lambda: date.today().month)
+    year: int = field(default_factory=lambda: date.today().year)
     line_ink: Any = (0, 0, 0, 0)
     appointment_spacing_px: int = 5
     appointment_padding_px: int = 8
@@ -24,12 +57,23 @@ class CalConfig:
     render_grid: bool = True
     draw_background: bool = True
     number_size:float = 60
-    font: ImageFont.FreeTypeFont = ImageFont.truetype(
-        "arial.ttf"
-        if "nt" in os.name.lower()
-        else "/usr/share/fonts/truetype/dejavu/DejaVuSerif.ttf",
-        12,
-    )
+    fetch_concurrency: int = 4
+    event_store: Optional[Path] = None
+    cache_dir: Optional[Path] = None
+    cache_base_layer: bool = False
+    # finished renders are kept in cache_dir, up to render_cache_bytes, and
+    # so are base layers, with a budget of their own of the same size
+    cache_renders: bool = False
+    render_cache_bytes: int = 64 * 1024 * 1024
+    # one of encoding.ENCODE_PROFILES
+    encode_profile: str = "png"
+    refresh_interval_s: float = 300
+    refresh_jitter_s: float = 30
+    # the http server reuses a render for this long
+    serve_max_age_s: float = 10
+    # event times are shown in this timezone, a pytz name
+    timezone: str = "UTC"
+    font: ImageFont.FreeTypeFont = _LazyFont()
 
     # @staticmethod
     # def as_CalConfig(dict):
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, List, Optional
+
+from magic_calender.config import CalConfig
+from magic_calender.encoding import encode
+from magic_calender.instrument import INSTRUMENT
+from magic_calender.magic_calender import MagicCalender
+
+
+class RefreshDaemon:
+    """Keeps one MagicCalender with its credentials, API service and fonts
+    alive and refreshes it on a schedule, writing the output only when the
+    image changed."""
+
+    def __init__(
+        self,
+        config: CalConfig,
+        output: Path,
+        events: Optional[Callable[[], List[Any]]] = None,
+        now: Callable[[], datetime] = datetime.now,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self._output = Path(output)
+        self._events = events
+        self._now = now
+        self._sleep = sleep
+        self.calender = MagicCalender(config)
+        self.writes = 0
+
+    def refresh(self) -> bool:
+        "Reloads and redraws the calender, returns if the output was written"
+        today = self._now().date()
+        self.calender.set_month(today.year, today.month)
+        self.calender.load(self._events() if self._events else None)
+        img, dirty = self.calender.draw_incremental()
+        if not dirty:
+            return False
+        # readers of the output never see a half written file
+        tmp_path = self._output.with_name(self._output.name + ".tmp")
+        encode(img, self.calender._config.encode_profile, tmp_path)
+        os.replace(tmp_path, self._output)
+        self.writes += 1
+        return True
+
+    def next_delay(self) -> float:
+        "Seconds until the next refresh, never sleeping past midnight"
+        config = self.calender._config
+        delay = config.refresh_interval_s + random.uniform(
+            -config.refresh_jitter_s, config.refresh_jitter_s
+        )
+        now = self._now()
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+        until_midnight = (midnight - now.replace(tzinfo=None)).total_seconds() + 1
+        return max(1.0, min(delay, until_midnight))
+
+    def run(self, iterations: Optional[int] = None) -> None:
+        done = 0
+        while iterations is None or done < iterations:
+            try:
+                self.refresh()
+            except Exception as exc:  # a failed refresh must not end the daemon
+                print(f"An error occurred: {exc}")
+            if INSTRUMENT.enabled:
+                INSTRUMENT.flush()
+            done += 1
+            if iterations is None or done < iterations:
+                self._sleep(self.next_delay())
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Optional, Union
+
+from PIL import Image
+
+Output = Union[str, os.PathLike, IO[bytes]]
+
+
+def _png(img: Image.Image, file: IO[bytes]) -> None:
+    img.save(file, "PNG")
+
+
+def _png_fast(img: Image.Image, file: IO[bytes]) -> None:
+    img.save(file, "PNG", compress_level=1)
+
+
+def _png_palette(img: Image.Image, file: IO[bytes]) -> None:
+    # a calender has few colours, 8 bit indices instead of 32 bit pixels
+    palette = img.quantize(256, method=Image.Quantize.FASTOCTREE)
+    palette.save(file, "PNG", optimize=True)
+
+
+def _grayscale(img: Image.Image, file: IO[bytes]) -> None:
+    img.convert("L").save(file, "PNG")
+
+
+def _raw(img: Image.Image, file: IO[bytes]) -> None:
+    "Pixels as they are in memory, row by row, for displays reading a framebuffer"
+    file.write(img.tobytes())
+
+
+ENCODE_PROFILES: Dict[str, Callable[[Image.Image, IO[bytes]], None]] = {
+    "png": _png,
+    "png-fast": _png_fast,
+    "png-palette": _png_palette,
+    "grayscale": _grayscale,
+    "raw": _raw,
+}
+# profiles whose output is a PNG file
+PNG_PROFILES = frozenset(("png", "png-fast", "png-palette", "grayscale"))
+
+# one worker keeps encodes in order, zlib releases the GIL while it runs
+_ENCODER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="encode")
+
+
+def encode(
+    img: Image.Image, profile: str = "png", output: Optional[Output] = None
+) -> Optional[bytes]:
+    """Encodes img with profile into a path or a binary file object. Without
+    output the encoded bytes are returned."""
+    if (write := ENCODE_PROFILES.get(profile)) is None:
+        raise RuntimeError(
+            f"Unknown encode profile {profile}, use one of {', '.join(ENCODE_PROFILES)}"
+        )
+    if output is None:
+        buffer = BytesIO()
+        write(img, buffer)
+        return buffer.getvalue()
+    if hasattr(output, "write"):
+        write(img, output)
+        return None
+    with Path(output).open("wb") as file:
+        write(img, file)
+    return None
+
+
+def encode_async(
+    img: Image.Image, profile: str = "png", output: Optional[Output] = None
+) -> "Future[Any]":
+    """Encodes a copy of img off the calling thread, so drawing can go on
+    right away. The future holds what encode returns."""
+    return _ENCODER.submit(encode, img.copy(), profile, output)
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from typing import NamedTuple, Optional
+
+from PIL import Image, ImageChops
+
+# palette index of every colour a black/white/red panel can show
+WHITE, BLACK, RED = 0, 1, 2
+PALETTE = (255, 255, 255, 0, 0, 0, 255, 0, 0)
+
+
+class EPaperFrame(NamedTuple):
+    """Packed bit planes, 8 pixels per byte with the leftmost pixel in the
+    highest bit and every row padded to a full byte."""
+
+    width: int
+    height: int
+    black: memoryview
+    red: memoryview
+
+
+def _palette_image() -> Image.Image:
+    palette = Image.new("P", (1, 1))
+    palette.putpalette(PALETTE + (0,) * (768 - len(PALETTE)))
+    return palette
+
+
+def _lut(condition) -> list:
+    return [255 if condition(value) else 0 for value in range(256)]
+
+
+def pack_planes(
+    img: Image.Image,
+    dither: bool = False,
+    threshold: Optional[int] = None,
+    inverted: bool = False,
+) -> EPaperFrame:
+    """Maps img onto white, black and red and packs a black and a red plane.
+
+    Without threshold every pixel becomes the nearest panel colour, with
+    Floyd-Steinberg dithering if dither is set. With threshold a pixel is red
+    if its red channel reaches the threshold while green and blue stay below,
+    and black if its luminance is below the threshold. Set bits mark inked
+    pixels, inverted flips that for panels which expect 0 for ink."""
+    rgb = img.convert("RGB")
+    if threshold is None:
+        indexed = rgb.quantize(
+            palette=_palette_image(),
+            dither=Image.Dither.FLOYDSTEINBERG if dither else Image.Dither.NONE,
+        )
+        black = indexed.point(_lut(lambda i: (i == BLACK) != inverted), "1")
+        red = indexed.point(_lut(lambda i: (i == RED) != inverted), "1")
+    else:
+        high = _lut(lambda v: v >= threshold)
+        low = _lut(lambda v: v < threshold)
+        r, g, b = rgb.split()
+        red = ImageChops.logical_and(
+            r.point(high, "1"),
+            ImageChops.logical_and(g.point(low, "1"), b.point(low, "1")),
+        )
+        dark = rgb.convert("L").point(low, "1")
+        black = ImageChops.logical_xor(dark, ImageChops.logical_and(dark, red))
+        if inverted:
+            black, red = ImageChops.invert(black), ImageChops.invert(red)
+    return EPaperFrame(
+        img.width, img.height, memoryview(black.tobytes()), memoryview(red.tobytes())
+    )
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import json
+import os
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from magic_calender.sources import overlaps
+
+# event fields apply reads besides the ones drawn
+STORE_FIELDS = {"id", "status"}
+
+
+class EventStore:
+    """Events and sync tokens per calendar, persisted as json so the next run
+    only has to ask the API for changes."""
+
+    def __init__(self, path: Path) -> None:
+        self._path = Path(path)
+        self._calendars: Dict[str, Dict[str, Any]] = {}
+        if self._path.is_file():
+            with self._path.open("r") as file:
+                self._calendars = json.load(file).get("calendars", {})
+
+    def sync_token(self, calendar_id: str, window: str) -> Optional[str]:
+        "Token of the last sync, only valid for the time window it was made for"
+        calendar = self._calendars.get(calendar_id)
+        if calendar and calendar["window"] == window:
+            return calendar["sync_token"]
+        return None
+
+    def replace(
+        self,
+        calendar_id: str,
+        window: str,
+        items: Iterable[Any],
+        sync_token: Optional[str],
+    ) -> None:
+        self._calendars[calendar_id] = {
+            "window": window,
+            "sync_token": sync_token,
+            "events": {},
+        }
+        self.apply(calendar_id, items, sync_token)
+
+    def apply(
+        self, calendar_id: str, items: Iterable[Any], sync_token: Optional[str]
+    ) -> None:
+        calendar = self._calendars[calendar_id]
+        events = calendar["events"]
+        for item in items:
+            if item.get("status") == "cancelled":
+                events.pop(item["id"], None)
+            else:
+                events[item["id"]] = item
+        calendar["sync_token"] = sync_token
+
+    def retain(self, calendar_ids: Iterable[str]) -> None:
+        "Forgets calendars which are no longer subscribed"
+        keep = set(calendar_ids)
+        for calendar_id in list(self._calendars):
+            if calendar_id not in keep:
+                del self._calendars[calendar_id]
+
+    def events(self) -> List[Any]:
+        return [
+            event
+            for calendar in self._calendars.values()
+            for event in calendar["events"].values()
+        ]
+
+    def prune(self) -> None:
+        """Drops events which moved out of the window of their calendar, delta
+        syncs report them but they are never shown"""
+        for calendar in self._calendars.values():
+            first, last = (
+                date.fromisoformat(bound[:10]) for bound in calendar["window"].split("/")
+            )
+            calendar["events"] = {
+                uid: event
+                for uid, event in calendar["events"].items()
+                if overlaps(event, first, last)
+            }
+
+    def save(self) -> None:
+        self.prune()
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._path.with_name(self._path.name + ".tmp")
+        with tmp_path.open("w") as file:
+            json.dump({"calendars": self._calendars}, file)
+        os.replace(tmp_path, self._path)
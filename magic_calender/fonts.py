@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import os
+from threading import Lock
+from typing import Dict, Iterable, Optional, Tuple
+
+from PIL.ImageFont import FreeTypeFont
+
+
+def font_file(font: FreeTypeFont) -> Optional[str]:
+    """Path of the file a font was loaded from, None for fonts loaded from
+    bytes or a file object. Only these can key anything kept across processes."""
+    path = getattr(font, "path", None)
+    return os.fspath(path) if isinstance(path, (str, os.PathLike)) else None
+
+
+class FontPool:
+    "Process wide FreeTypeFont objects keyed by (font path, size, index)"
+
+    def __init__(self) -> None:
+        self._fonts: Dict[Tuple[object, float, int], FreeTypeFont] = {}
+        self._lock = Lock()
+
+    @staticmethod
+    def _key(font: FreeTypeFont, size: float) -> Tuple[object, float, int]:
+        return (getattr(font, "path", None) or id(font), size, getattr(font, "index", 0))
+
+    def get(self, font: FreeTypeFont, size: Optional[float] = None) -> FreeTypeFont:
+        "Shared variant of font in the given size, loaded on first use"
+        size = font.size if size is None else size
+        key = self._key(font, size)
+        with self._lock:
+            if (pooled := self._fonts.get(key)) is None:
+                pooled = self._fonts[key] = (
+                    font if font.size == size else font.font_variant(size=size)
+                )
+        return pooled
+
+    def preload(self, font: FreeTypeFont, sizes: Iterable[float]) -> None:
+        for size in sizes:
+            self.get(font, size)
+
+    def stats(self) -> Dict[str, int]:
+        """Number of loaded faces and the on-disk size of the font files they
+        were loaded from, counted once per face. Not the memory FreeType uses."""
+        with self._lock:
+            fonts = list(self._fonts.values())
+        paths = [getattr(font, "path", None) for font in fonts]
+        return {
+            "faces": len(fonts),
+            "file_bytes": sum(
+                os.path.getsize(path)
+                for path in paths
+                if isinstance(path, (str, os.PathLike)) and os.path.isfile(path)
+            ),
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._fonts.clear()
+
+
+FONT_POOL = FontPool()
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+import logging
+import time
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+from pathlib import Path
+from threading import Lock
+from typing import Any, Callable, Dict, List, Optional
+
+_NO_SPAN = nullcontext()
+
+
+class LogSink:
+    "Logs every report as one json line"
+
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.INFO) -> None:
+        self._logger = logger or logging.getLogger("magic_calender")
+        self._level = level
+
+    def emit(self, report: Dict[str, Any]) -> None:
+        self._logger.log(self._level, "%s", json.dumps(report, sort_keys=True))
+
+
+class JsonFileSink:
+    "Appends every report as one json line to a file"
+
+    def __init__(self, path: Path) -> None:
+        self._path = Path(path)
+
+    def emit(self, report: Dict[str, Any]) -> None:
+        with self._path.open("a") as file:
+            file.write(json.dumps(report, sort_keys=True) + "\n")
+
+
+class MemorySink:
+    "Keeps the reports, for tests"
+
+    def __init__(self) -> None:
+        self.reports: List[Dict[str, Any]] = []
+
+    def emit(self, report: Dict[str, Any]) -> None:
+        self.reports.append(report)
+
+
+class Instrument:
+    """Wall time and call count per span plus named counters. Disabled it
+    only costs a flag check per call."""
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self._sink: Any = None
+        self._lock = Lock()
+        self._spans: Dict[str, Dict[str, float]] = {}
+        self._counters: Dict[str, int] = {}
+
+    def enable(self, sink: Any = None) -> None:
+        "Starts recording, sink gets a report on every flush"
+        self._sink = sink
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+        self._sink = None
+        self.reset()
+
+    def span(self, name: str):
+        "Context manager timing its body as one call of the span name"
+        if not self.enabled:
+            return _NO_SPAN
+        return self._span(name)
+
+    @contextmanager
+    def _span(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                span = self._spans.get(name)
+                if span is None:
+                    span = self._spans[name] = {"calls": 0, "total_s": 0.0, "max_s": 0.0}
+                span["calls"] += 1
+                span["total_s"] += elapsed
+                span["max_s"] = max(span["max_s"], elapsed)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "spans": {name: dict(span) for name, span in self._spans.items()},
+                "counters": dict(self._counters),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._spans.clear()
+            self._counters.clear()
+
+    def flush(self) -> Dict[str, Any]:
+        "Sends what was recorded since the last flush to the sink and resets"
+        report = self.snapshot()
+        report["time"] = time.time()
+        self.reset()
+        if self._sink is not None:
+            self._sink.emit(report)
+        return report
+
+
+INSTRUMENT = Instrument()
+
+
+def timed(name: str) -> Callable:
+    "Decorator recording every call of the function as the span name"
+
+    def decorator(function: Callable) -> Callable:
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if not INSTRUMENT.enabled:
+                return function(*args, **kwargs)
+            with INSTRUMENT._span(name):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
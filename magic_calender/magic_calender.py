@@ -1,44 +1,67 @@
 from __future__ import annotations
 
-
+import json
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import replace
 from datetime import datetime, date
 from pathlib import Path
 from calendar import Calendar, monthrange
-from typing import Any, List, Optional, Set
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple, Union
 
 import pytz
-
-from google.auth.transport.requests import Request
-from google.auth.exceptions import RefreshError
-from google.oauth2.credentials import Credentials
-from google_auth_oauthlib.flow import Flow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-
 from PIL import Image, ImageDraw
 
 
-from magic_calender.core.appointment import Appointment
+from magic_calender.core.appointment import EVENT_FIELDS, Appointment, ingest
+from magic_calender.core.day_index import DayIndex
 from magic_calender.core.point import Point
-from magic_calender.core.grid import Grid
+from magic_calender.core.grid import HEADER_CELL, Grid
+from magic_calender.core.layout import LayoutRow, MonthLayout, layout_month
 from magic_calender.core.box import Box
+from magic_calender.base_layer import BASE_LAYERS, base_layer_key, layer_dir
 from magic_calender.config import CalConfig
+from magic_calender.encoding import Output, encode, encode_async
+from magic_calender.epaper import EPaperFrame, pack_planes
+from magic_calender.event_store import STORE_FIELDS, EventStore
+from magic_calender.fonts import FONT_POOL, font_file
+from magic_calender.instrument import INSTRUMENT, timed
+from magic_calender.render_cache import (
+    RenderCache,
+    RenderResult,
+    copy_render,
+    render_key,
+    rendered_settings,
+)
+from magic_calender.render_state import DrawnState, RecordingDraw
+from magic_calender.sources import EventSource, GoogleSource, ListSource
 
 
 
 
 class MagicDay:
     def __init__(
-        self, day: int, appointments: Set[Appointment], config: CalConfig
+        self,
+        day: int,
+        appointments: Iterable[Appointment],
+        config: CalConfig,
+        index: Optional[DayIndex] = None,
     ) -> None:
-        self._appointments = [
-            a
-            for a in appointments
-            if a.on_day(datetime(config.year, config.month, day, tzinfo=pytz.UTC))
-        ]
-        self._appointments.sort()
+        if index is None:
+            index = DayIndex(appointments, config.year, config.month)
+        self._appointments = index.on_day(day)
         self._day = day
 
+    def signature(self, layout: Optional[MonthLayout] = None) -> Tuple:
+        """Everything besides the config and grid the drawn cell depends on.
+        With the month layout that includes the lanes bars of other days use."""
+        return (
+            date.today().day == self._day,
+            tuple((a.id, a.summary, a.start, a.end) for a in self._appointments),
+            tuple(row[:6] for row in layout.rows(self._day)) if layout else (),
+        )
+
     def _get_day_color(self, config: CalConfig, grid: Grid):
         if date.today().day == self._day:
             return (255, 255, 255, 255)
@@ -51,57 +74,188 @@ class MagicDay:
         self, img: ImageDraw.ImageDraw, point_text: Point, bounding_box: Box
     ) -> int:
         if date.today().day == self._day:
-            box = bounding_box.encapsulating_square()
-            box.anker_to(point_text)
+            box = bounding_box.encapsulating_square().anker_to(point_text)
             img.ellipse(box.as_tuple(), fill=(255, 0, 0, 255))
             return box.p_end.y - box.p_start.y
         return 0
 
-    def draw(self, config: CalConfig, grid: Grid, img: ImageDraw.ImageDraw):
+    def is_today(self) -> bool:
+        return date.today().day == self._day
+
+    def base_offset(self, config: CalConfig) -> int:
+        "Offset below the number, and today's circle, where appointments start"
+        font = FONT_POOL.get(config.font, config.number_size)
+        bounding_box = Box.fromtuple(font.getbbox(str(self._day)))
+        offset = bounding_box.p_end.y + config.day_spacing_px
+        if self.is_today():
+            offset = max(offset, (bounding_box + 5).encapsulating_square().height)
+        return offset
+
+    def draw_number(self, config: CalConfig, grid: Grid, img: ImageDraw.ImageDraw):
+        "Draws the static part of the day, which is the number unless it is today"
+        if not self.is_today():
+            self._draw(config, grid, img, number=True, appointments=False)
+
+    @timed("day.draw")
+    def draw(
+        self,
+        config: CalConfig,
+        grid: Grid,
+        img: ImageDraw.ImageDraw,
+        on_base: bool = False,
+        layout: Optional[MonthLayout] = None,
+    ):
+        """on_base: img already holds what draw_number draws. layout: the month
+        layout, this day is laid out on its own without it"""
+        self._draw(config, grid, img, number=not on_base or self.is_today(), layout=layout)
+
+    def _draw(
+        self,
+        config: CalConfig,
+        grid: Grid,
+        img: ImageDraw.ImageDraw,
+        number: bool = True,
+        appointments: bool = True,
+        layout: Optional[MonthLayout] = None,
+    ):
         coords = grid.get_coords_to_draw(self._day)
-        font = config.font.font_variant(size=config.number_size)
+        font = FONT_POOL.get(config.font, config.number_size)
         bounding_box = Box.fromtuple(font.getbbox(str(self._day)))
+        INSTRUMENT.count("text_measurements")
         _offset_x = (
             coords.p_end.x
             - coords.p_start.x
             - (bounding_box.p_end.x - bounding_box.p_start.x)
         ) / 2
-        _offset_y = bounding_box.p_end.y + config.day_spacing_px
         coords_to_draw = coords.p_start + (_offset_x, 0)
-        _offset_y = max(_offset_y,self._draw_circle(img, coords_to_draw, bounding_box + 5))
-        img.text(
-            coords_to_draw.as_tuple(),
-            f"{self._day}",
-            font=font,
-            fill=self._get_day_color(config, grid),
-        )
-        for app in self._appointments:
-            _offset_y += config.appointment_spacing_px
-            _offset_y += app.draw(config, grid, img, _offset_y,self._day)
+        if number:
+            self._draw_circle(img, coords_to_draw, bounding_box + 5)
+            img.text(
+                coords_to_draw.as_tuple(),
+                f"{self._day}",
+                font=font,
+                fill=self._get_day_color(config, grid),
+            )
+        if not appointments:
+            return
+        if layout is None:
+            layout = layout_month(
+                config, grid, [(self._day, self.base_offset(config), self._appointments)]
+            )
+        for row in layout.rows(self._day):
+            if not row.visible:
+                continue
+            if row.appointment is None:
+                self._draw_more(config, img, row)
+            else:
+                row.appointment.draw(config, grid, img, row.offset, self._day, layout=row)
+
+    def _draw_more(self, config: CalConfig, img: ImageDraw.ImageDraw, row: LayoutRow):
+        "Draws the marker standing in for the appointments that didn't fit"
+        img.text(row.xy, row.text, config.line_ink, font=FONT_POOL.get(config.font))
 
 class MagicMonth:
     def __init__(self, config: CalConfig, grid: Grid, appointments: List[Appointment]):
         self._month = config.month
         self.days = []
+        index = DayIndex(appointments, config.year, config.month)
         for week in grid._cal:
             for day in week:
                 if day != 0:
-                    self.days.append(MagicDay(day, appointments, config))
+                    self.days.append(MagicDay(day, appointments, config, index))
+        self._layout: Optional[Tuple[Any, MonthLayout]] = None
+
+    def layout(self, config: CalConfig, grid: Grid) -> MonthLayout:
+        """Layout of all days, redone when today or anything it is computed
+        from changes. The key holds the font itself, so it can't be mistaken
+        for another font that reuses its id."""
+        font = config.font
+        key = (
+            rendered_settings(config),
+            font,
+            font.size,
+            getattr(font, "index", 0),
+            tuple(map(tuple, grid._cal)),
+            grid._height_per_row,
+            grid._width_per_col,
+            date.today(),
+        )
+        if self._layout is None or self._layout[0] != key:
+            self._layout = (
+                key,
+                layout_month(
+                    config,
+                    grid,
+                    [(day._day, day.base_offset(config), day._appointments) for day in self.days],
+                ),
+            )
+        return self._layout[1]
 
-    def _get_header_text_size(self, config: CalConfig) -> int:
+    # header sizes by font, month text and header space, shared by all months.
+    # Fonts loaded from a file are keyed by path and persisted, others by the
+    # font object itself, which is only good for this process.
+    _header_sizes: Dict[Union[str, Tuple[Any, ...]], int] = {}
+
+    def _search_header_text_size(self, config: CalConfig) -> int:
         diff = 2
         font_size = 1
-        while diff > 1:
+        for _ in range(HEADER_SEARCH_STEPS):
+            if diff <= 1:
+                break
             font_size = int(font_size + diff / 2)
+            # probe sizes are thrown away, only the result goes into the pool
             font = config.font.font_variant(size=int(font_size + diff / 2))
             box = Box.fromtuple(font.getbbox(str(self._month)))
+            INSTRUMENT.count("text_measurements")
             diff = config.header_spacing_px - box.p_end.y
 
         return font_size
 
-    def draw(self, config: CalConfig, grid: Grid, img: ImageDraw.ImageDraw):
-        font = config.font.font_variant(size=self._get_header_text_size(config))
+    def _header_key(self, config: CalConfig) -> Union[str, Tuple[Any, ...]]:
+        font = config.font
+        parts = (getattr(font, "index", 0), self._month, config.header_spacing_px)
+        if path := font_file(font):
+            return "|".join(str(part) for part in (path, *parts))
+        return (font, *parts)
+
+    @staticmethod
+    def _read_header_sizes(path: Path) -> Dict[str, int]:
+        "Persisted sizes, a missing or broken file counts as empty"
+        try:
+            with path.open("r") as file:
+                sizes = json.load(file)
+        except (OSError, json.JSONDecodeError):
+            return {}
+        return sizes if isinstance(sizes, dict) else {}
+
+    def _write_header_sizes(self, path: Path) -> None:
+        # batch workers share the cache dir, merge what they wrote meanwhile
+        sizes = self._read_header_sizes(path)
+        sizes.update((key, size) for key, size in self._header_sizes.items() if isinstance(key, str))
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        with tmp_path.open("w") as file:
+            json.dump(sizes, file)
+        os.replace(tmp_path, path)
+
+    def _get_header_text_size(self, config: CalConfig) -> int:
+        key = self._header_key(config)
+        persisted = isinstance(key, str) and config.cache_dir
+        sizes_path = config.cache_dir / HEADER_SIZES_FILE if persisted else None
+        if key not in self._header_sizes and sizes_path:
+            self._header_sizes.update(self._read_header_sizes(sizes_path))
+        if (size := self._header_sizes.get(key)) is None:
+            size = self._header_sizes[key] = self._search_header_text_size(config)
+            if sizes_path:
+                self._write_header_sizes(sizes_path)
+        return size
+
+    def draw_header(self, config: CalConfig, img: ImageDraw.ImageDraw):
+        header_size = self._get_header_text_size(config)
+        FONT_POOL.preload(config.font, (config.font.size, config.number_size, header_size))
+        font = FONT_POOL.get(config.font, header_size)
         box = Box.fromtuple(font.getbbox(str(self._month)))
+        INSTRUMENT.count("text_measurements")
         p = Point(
             int((config.width / 2) - box.width / 2),
             -int(box.p_start.y / 2),  # might not work with different fonts
@@ -113,25 +267,54 @@ class MagicMonth:
             font=font,
         )
         # img.point(p.as_tuple(), (255, 0, 0))
+
+    def draw(self, config: CalConfig, grid: Grid, img: ImageDraw.ImageDraw):
+        self.draw_header(config, img)
+        layout = self.layout(config, grid)
         for day in self.days:
-            day.draw(config, grid, img)
+            day.draw(config, grid, img, layout=layout)
 
 
 class MagicCalender(Calendar):
     month: Optional[MagicMonth] = None
 
-    def __init__(self, config: CalConfig = CalConfig(), firstweekday: int = 0) -> None:
+    def __init__(self, config: Optional[CalConfig] = None, firstweekday: int = 0) -> None:
+        self._config = config or CalConfig()
+        self._new_canvas()
+        self._store: Optional[EventStore] = None
+        self._appointments: List[Appointment] = []
+        self._creds = None
+        self._service = None
+        super().__init__(firstweekday)
+
+    def _new_canvas(self) -> None:
         self._img = Image.new(
             "RGBA",
-            (config.width, config.height),
+            (self._config.width, self._config.height),
             color=(255, 255, 255, 255),
         )
         self._id = ImageDraw.Draw(self._img)
-        self._config = config
-        self._grid = Grid(config)
-        super().__init__(firstweekday)
+        self._grid = Grid(self._config)
+        self._states: Dict[int, DrawnState] = {}
+        self._base_key: Optional[str] = None
+        # the month was served from the render cache, the canvas is behind it
+        self._stale = False
+
+    def set_month(self, year: int, month: int) -> None:
+        "Switches to another month, keeping credentials, service and event store"
+        if (year, month) == (self._config.year, self._config.month):
+            return
+        self._config = replace(self._config, year=year, month=month)
+        self._new_canvas()
+        self.month = None
 
     def get_gcal_creds(self):
+        # the google stack is slow to import, only pay for it when it is used
+        from google.auth.transport.requests import Request
+        from google.auth.exceptions import RefreshError
+        from google.oauth2.credentials import Credentials
+        from google_auth_oauthlib.flow import Flow
+
         creds = None
         # The file token.json stores the user's access and refresh tokens, and is
         # created automatically when the authorization flow completes for the first
@@ -162,77 +345,457 @@ class MagicCalender(Calendar):
                     )
         return creds
 
-    def get_events_api(self) -> List[Any]:
-        _creds = self.get_gcal_creds()
+    @staticmethod
+    def event_fields() -> str:
+        "Partial response mask for events.list, what is drawn and what the store needs"
+        items = ",".join(sorted(EVENT_FIELDS | STORE_FIELDS))
+        return f"nextPageToken,nextSyncToken,items({items})"
+
+    @staticmethod
+    def _thread_http(creds) -> Callable[[], Any]:
+        import httplib2
+        from google_auth_httplib2 import AuthorizedHttp
+        from googleapiclient.http import set_user_agent
+
+        # httplib2 is not thread safe, every worker needs its own connection
+        local = threading.local()
+
+        def http():
+            if not hasattr(local, "http"):
+                # the api only compresses for user agents naming gzip, the
+                # client library adds that and accept-encoding to every request
+                local.http = set_user_agent(
+                    AuthorizedHttp(creds, http=httplib2.Http()), USER_AGENT
+                )
+            return local.http
+
+        return http
+
+    @staticmethod
+    def _execute(request, http: Optional[Callable[[], Any]] = None):
+        INSTRUMENT.count("api_calls")
+        return request.execute(http=http()) if http else request.execute()
+
+    def _pages(self, list_method, http: Optional[Callable[[], Any]] = None, **params):
+        page_token = None
+        while True:
+            result = self._execute(list_method(pageToken=page_token, **params), http)
+            yield result
+            page_token = result.get("nextPageToken")
+            if not page_token:
+                return
+
+    def _list_calendars(
+        self, service, http: Optional[Callable[[], Any]] = None
+    ) -> List[Any]:
+        return [
+            calendar
+            for page in self._pages(
+                service.calendarList().list, http, fields=CALENDAR_LIST_FIELDS
+            )
+            for calendar in page.get("items", [])
+        ]
+
+    def _list_events(
+        self,
+        service,
+        calendar_id: str,
+        time_min: str,
+        time_max: str,
+        http: Optional[Callable[[], Any]] = None,
+    ) -> List[Any]:
+        return [
+            event
+            for page in self._pages(
+                service.events().list,
+                http,
+                calendarId=calendar_id,
+                timeMin=time_min,
+                timeMax=time_max,
+                singleEvents=True,
+                orderBy="startTime",
+                fields=self.event_fields(),
+            )
+            for event in page.get("items", [])
+        ]
+
+    def _sync_calendar(
+        self,
+        service,
+        calendar_id: str,
+        time_min: str,
+        time_max: str,
+        sync_token: Optional[str],
+        http: Optional[Callable[[], Any]] = None,
+    ) -> Tuple[List[Any], Optional[str], bool]:
+        "Returns the changed events, the next sync token and if it was a full sync"
+        params = {
+            "calendarId": calendar_id,
+            "singleEvents": True,
+            "fields": self.event_fields(),
+        }
+        if sync_token:
+            params["syncToken"] = sync_token
+        else:
+            params.update(timeMin=time_min, timeMax=time_max)
+        items = []
+        try:
+            for page in self._pages(service.events().list, http, **params):
+                items += page.get("items", [])
+        except Exception as error:
+            # an HttpError, checked without importing googleapiclient
+            if sync_token and getattr(getattr(error, "resp", None), "status", None) == 410:
+                # sync token is no longer valid, start over with a full sync
+                return self._sync_calendar(
+                    service, calendar_id, time_min, time_max, None, http
+                )
+            raise
+        return items, page.get("nextSyncToken"), not sync_token
+
+    def sync_events(
+        self,
+        service,
+        store: EventStore,
+        time_min: str,
+        time_max: str,
+        http: Optional[Callable[[], Any]] = None,
+    ) -> List[Any]:
+        """Brings the store up to date using the sync tokens it holds and
+        returns all events in it."""
+        calendars = self._list_calendars(service, http)
+        window = f"{time_min}/{time_max}"
+        with ThreadPoolExecutor(
+            max_workers=max(1, self._config.fetch_concurrency)
+        ) as pool:
+            results = pool.map(
+                lambda entry: self._sync_calendar(
+                    service,
+                    entry["id"],
+                    time_min,
+                    time_max,
+                    store.sync_token(entry["id"], window),
+                    http,
+                ),
+                calendars,
+            )
+            for entry, (items, sync_token, full) in zip(calendars, results):
+                if full:
+                    store.replace(entry["id"], window, items, sync_token)
+                else:
+                    store.apply(entry["id"], items, sync_token)
+        store.retain(entry["id"] for entry in calendars)
+        store.save()
+        return store.events()
+
+    def fetch_events(
+        self,
+        service,
+        time_min: str,
+        time_max: str,
+        http: Optional[Callable[[], Any]] = None,
+    ) -> List[Any]:
+        """Fetches every page of every calendar, at most
+        ``fetch_concurrency`` calendars at a time."""
+        calendars = self._list_calendars(service, http)
+        with ThreadPoolExecutor(
+            max_workers=max(1, self._config.fetch_concurrency)
+        ) as pool:
+            pages = pool.map(
+                lambda entry: self._list_events(
+                    service, entry["id"], time_min, time_max, http
+                ),
+                calendars,
+            )
+            return [event for events in pages for event in events]
+
+    @staticmethod
+    def month_range(
+        year: int, month: int, last_year: Optional[int] = None, last_month: Optional[int] = None
+    ) -> Tuple[str, str]:
+        "timeMin and timeMax from the start of a month to the end of the last one"
+        last_year = year if last_year is None else last_year
+        last_month = month if last_month is None else last_month
+        now = (
+            datetime.combine(date(year, month, 1), datetime.min.time()).isoformat()
+            + "Z"
+        )  # 'Z' indicates UTC time 2023-12-23T20:21:21.096973Z
+        last_day_of_month = monthrange(last_year, last_month)[1]
+        ldam = (
+            datetime.combine(
+                date(last_year, last_month, last_day_of_month),
+                datetime.max.time(),
+            ).isoformat()
+            + "Z"
+        )  # 'Z' indicates UTC time
+        return now, ldam
+
+    @timed("calender.get_events_api")
+    def get_events_api(
+        self, time_min: Optional[str] = None, time_max: Optional[str] = None
+    ) -> List[Any]:
+        from googleapiclient.discovery import build
+        from googleapiclient.errors import HttpError
+
+        # credentials and service are kept for later refreshes
+        _creds = self._creds = self._creds or self.get_gcal_creds()
         if not _creds:
             raise RuntimeError("Credentials not loaded yet")
         try:
-            service = build("calendar", "v3", credentials=_creds)
-
-            # Call the Calendar API
-            now = (
-                datetime.combine(
-                    date(self._config.year, self._config.month, 1), datetime.min.time()
-                ).isoformat()
-                + "Z"
-            )  # 'Z' indicates UTC time 2023-12-23T20:21:21.096973Z
-            last_day_of_month = monthrange(self._config.year, self._config.month)[1]
-            ldam = (
-                datetime.combine(
-                    date(self._config.year, self._config.month, last_day_of_month),
-                    datetime.max.time(),
-                ).isoformat()
-                + "Z"
-            )  # 'Z' indicates UTC time
-            page_token = None
-            events = []
-            calendar_list = service.calendarList().list(pageToken=page_token).execute()
-            while True:
-                for calendar_list_entry in calendar_list["items"]:
-                    print(calendar_list_entry["id"])
-                    print("Getting the upcoming events")
-                    events_result = (
-                        service.events()
-                        .list(
-                            calendarId=calendar_list_entry["id"],
-                            timeMin=now,
-                            timeMax=ldam,
-                            # maxResults=1,
-                            singleEvents=True,
-                            orderBy="startTime",
-                        )
-                        .execute()
-                    )
-                    events += events_result.get("items", [])
-                page_token = calendar_list.get("nextPageToken")
-                if not page_token:
-                    break
-
+            if self._service is None:
+                self._service = build("calendar", "v3", credentials=_creds)
+            service = self._service
+
+            # Call the Calendar API, by default for the configured month
+            now, ldam = self.month_range(self._config.year, self._config.month)
+            now, ldam = time_min or now, time_max or ldam
+            if self._config.event_store:
+                if not self._store:
+                    self._store = EventStore(self._config.event_store)
+                events = self.sync_events(
+                    service, self._store, now, ldam, self._thread_http(_creds)
+                )
+            else:
+                events = self.fetch_events(service, now, ldam, self._thread_http(_creds))
+            INSTRUMENT.count("events_fetched", len(events))
             return events
 
         except HttpError as error:
-            print(f"An error occurred: {error}")
-            return []
-
-    def load(self, events: Optional[List] = None):
-        _events = self.get_events_api() if not events else events
-        events_cleaned = set([Appointment(event) for event in _events])
-        self.month = MagicMonth(
-            self._config,
-            self._grid,
-            list(events_cleaned),
+            # an empty month would replace the last good image, let callers keep it
+            raise RuntimeError(f"Calendar API request failed: {error}") from error
+
+    @timed("calender.load")
+    def load(self, events: Union[None, EventSource, Iterable[Any]] = None):
+        """Loads the month from a source or a list of events, by default from
+        the Google Calendar api. Events are parsed as the source yields them."""
+        if events is None:
+            source = GoogleSource(self)
+        elif isinstance(events, EventSource):
+            source = events
+        else:
+            source = ListSource(events)
+        first = date(self._config.year, self._config.month, 1)
+        last = first.replace(day=monthrange(first.year, first.month)[1])
+        # first one wins for duplicate ids, in input order so renders are repeatable
+        appointments = list(
+            ingest(source.events(first, last), pytz.timezone(self._config.timezone))
         )
-
+        INSTRUMENT.count("events_loaded", len(appointments))
+        self._appointments = appointments
+        self.month = MagicMonth(self._config, self._grid, appointments)
+
+    def render_key(self) -> str:
+        "Digest of the loaded month as it would be drawn today"
+        first = date(self._config.year, self._config.month, 1)
+        last = first.replace(day=monthrange(first.year, first.month)[1])
+        shown = []
+        for app in self._appointments:
+            start, end = app.day_span()
+            if start <= last and end >= first:
+                shown.append(app)
+        return render_key(self._config, shown, date.today())
+
+    @timed("calender.render")
+    def render(self, filepath: Optional[Path] = None) -> RenderResult:
+        """Draws and saves the loaded month. With cache_renders and a cache_dir
+        a month rendered before is copied from the cache without drawing or
+        encoding, and without filepath the cached file itself is returned."""
+        if not self.month:
+            raise RuntimeError("month not loaded yet")
+        config = self._config
+        # keys of fonts not loaded from a file mean nothing to another process
+        if not (config.cache_renders and config.cache_dir and font_file(config.font)):
+            filepath = Path("test.png") if filepath is None else Path(filepath)
+            self.draw()
+            self.save(filepath)
+            return RenderResult(filepath, False)
+        cache = RenderCache(Path(config.cache_dir), config.render_cache_bytes)
+        key = self.render_key()
+        cached = cache.get(key)
+        hit = cached is not None
+        if hit:
+            INSTRUMENT.count("render_cache_hits")
+            # nothing was drawn, the next save or incremental draw starts over
+            self._states = {}
+            self._stale = True
+        else:
+            self.draw()
+            # batch workers and the daemon share the cache dir
+            path = cache.path(key)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_path.parent.mkdir(parents=True, exist_ok=True)
+            self.save(tmp_path)
+            cached = cache.put(key, tmp_path)
+        if filepath is None:
+            return RenderResult(cached, hit)
+        copy_render(cached, Path(filepath))
+        return RenderResult(Path(filepath), hit)
+
+    def _drawables(
+        self, on_base: bool = False
+    ) -> Dict[int, Tuple[Any, Callable[[Any], None]]]:
+        "Header (key 0) and days in drawing order with their signature"
+        config, grid, month = self._config, self._grid, self.month
+        drawables = {
+            0: (
+                ("header", month._month),
+                (lambda img: None)
+                if on_base
+                else (lambda img: month.draw_header(config, img)),
+            )
+        }
+        layout = month.layout(config, grid)
+        for day in month.days:
+            drawables[day._day] = (
+                day.signature(layout),
+                lambda img, day=day: day.draw(
+                    config, grid, img, on_base, month.layout(config, grid)
+                ),
+            )
+        return drawables
+
+    def _base_layer(self) -> Tuple[str, Image.Image]:
+        "Grid, header and day numbers, rendered once per month, config and day"
+        key = base_layer_key(self._config, date.today().day)
+        cache_dir = layer_dir(self._config)
+        if (layer := BASE_LAYERS.get(key, cache_dir)) is None:
+            layer = Image.new(
+                "RGBA",
+                (self._config.width, self._config.height),
+                color=(255, 255, 255, 255),
+            )
+            img = RecordingDraw(ImageDraw.Draw(layer))
+            self._grid.draw(img)
+            self.month.draw_header(self._config, img)
+            for day in self.month.days:
+                day.draw_number(self._config, self._grid, img)
+            BASE_LAYERS.put(key, layer, cache_dir, self._config.render_cache_bytes)
+        return key, layer
+
+    def _own_cell(self, key: int) -> Tuple[int, int]:
+        return HEADER_CELL if key == 0 else self._grid._where(key)
+
+    def _draw_recorded(self, drawables, keys: Optional[Set[int]] = None) -> None:
+        for key, (signature, draw) in drawables.items():
+            if keys is None or key in keys:
+                recorder = RecordingDraw(self._id)
+                draw(recorder)
+                cells = {self._own_cell(key)}
+                for bbox in recorder.boxes:
+                    cells |= self._grid.cells_touching(bbox)
+                self._states[key] = DrawnState(signature, frozenset(cells))
+
+    @timed("calender.draw")
     def draw(self):
-        self._grid.draw(self._id)
+        self._stale = False
+        if self.month and self._config.cache_base_layer:
+            self._base_key, base = self._base_layer()
+            self._img.paste(base)
+            self._states = {}
+            self._draw_recorded(self._drawables(on_base=True))
+            return
+        self._grid.draw(RecordingDraw(self._id))
         if self.month:
-            self.month.draw(self._config, self._grid, self._id)
+            self._states = {}
+            self._draw_recorded(self._drawables())
         else:
             raise RuntimeError("month not loaded yet")
 
-    def save(self, filepath: Path = Path("test.png")):
-        self._img.save(filepath, "PNG")
+    @timed("calender.draw_incremental")
+    def draw_incremental(self) -> Tuple[Image.Image, List[Box]]:
+        """Redraws only the cells whose content changed since the last draw
+        and returns the image with the changed rectangles."""
+        if not self.month:
+            raise RuntimeError("month not loaded yet")
+        base = None
+        if self._config.cache_base_layer:
+            key, base = self._base_layer()
+            if key != self._base_key:
+                self._states = {}
+        if not self._states:
+            self.draw()
+            return self._img, [
+                Box(Point(0, 0), Point(self._config.width - 1, self._config.height - 1))
+            ]
+        drawables = self._drawables(on_base=base is not None)
+        dirty = {
+            key
+            for key, (signature, _) in drawables.items()
+            if key not in self._states or self._states[key].signature != signature
+        }
+        if not dirty:
+            return self._img, []
+        region = set()
+        for key in dirty:
+            if key in self._states:
+                region |= self._states[key].cells
+            recorder = RecordingDraw(self._id, dry=True)
+            drawables[key][1](recorder)
+            region.add(self._own_cell(key))
+            for bbox in recorder.boxes:
+                region |= self._grid.cells_touching(bbox)
+        # everything overlapping a cleared cell has to be drawn again as well
+        redraw = set(dirty)
+        grown = True
+        while grown:
+            grown = False
+            for key, state in self._states.items():
+                if key in drawables and key not in redraw and state.cells & region:
+                    redraw.add(key)
+                    region |= state.cells
+                    grown = True
+        canvas = RecordingDraw(self._id)
+        for cell in region:
+            area = self._grid.cell_area(cell)
+            if base:
+                self._img.paste(
+                    base.crop(area.as_tuple()[:2] + (area.p_end + 1).as_tuple()),
+                    area.p_start.as_tuple(),
+                )
+            else:
+                canvas.rectangle(area.as_tuple(), fill=(255, 255, 255, 255))
+        if not base:
+            for cell in region:
+                self._grid.draw_cell(cell, canvas)
+        self._draw_recorded(drawables, redraw)
+        return self._img, self._grid.merge_cells(region)
+
+    def _drawn(self) -> Image.Image:
+        "The image, drawn first when a cached render stood in for drawing it"
+        if self._stale:
+            self.draw()
+        return self._img
+
+    @timed("calender.save")
+    def save(self, filepath: Output = Path("test.png"), profile: Optional[str] = None):
+        "Encodes into a path or a binary file object, by default with encode_profile"
+        encode(self._drawn(), profile or self._config.encode_profile, filepath)
+
+    @timed("calender.to_bytes")
+    def to_bytes(self, profile: Optional[str] = None) -> bytes:
+        return encode(self._drawn(), profile or self._config.encode_profile)
+
+    def save_async(self, output: Optional[Output] = None, profile: Optional[str] = None) -> Future:
+        """Encodes a copy of the image on the encoder thread. The future holds
+        the bytes when no output is given."""
+        return encode_async(self._drawn(), profile or self._config.encode_profile, output)
+
+    def to_epaper(
+        self, dither: bool = False, threshold: Optional[int] = None, inverted: bool = False
+    ) -> EPaperFrame:
+        "Black and red bit planes of the drawn calender for tri-colour panels"
+        return pack_planes(self._drawn(), dither, threshold, inverted)
+
+    def save_epaper(self, filepath: Path = Path("test.epd"), **kwargs):
+        "Writes the black plane followed by the red plane"
+        frame = self.to_epaper(**kwargs)
+        with open(filepath, "wb") as file:
+            file.write(frame.black)
+            file.write(frame.red)
 
 
 # If modifying these scopes, delete the file token.json.
 SCOPES = ["https://www.googleapis.com/auth/calendar.readonly"]
+USER_AGENT = "magic_calender"
+CALENDAR_LIST_FIELDS = "nextPageToken,items(id)"
+HEADER_SEARCH_STEPS = 64
+HEADER_SIZES_FILE = "header_sizes.json"
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import calendar
+import filecmp
+import hashlib
+import os
+import shutil
+from dataclasses import fields
+from datetime import date
+from pathlib import Path
+from threading import Lock
+from typing import Iterable, NamedTuple, Optional, Tuple
+
+from magic_calender.config import CalConfig
+from magic_calender.fonts import font_file
+
+# config fields that only change how events are fetched or cached, not the image
+NOT_RENDERED = {
+    "fetch_concurrency",
+    "event_store",
+    "cache_dir",
+    "cache_base_layer",
+    "cache_renders",
+    "render_cache_bytes",
+    "refresh_interval_s",
+    "refresh_jitter_s",
+    "serve_max_age_s",
+    "font",
+}
+
+
+def rendered_settings(config: CalConfig) -> Tuple[Tuple[str, str], ...]:
+    "Name and repr of every config field the image depends on, font aside"
+    return tuple(
+        (field.name, repr(getattr(config, field.name)))
+        for field in fields(config)
+        if field.name not in NOT_RENDERED
+    )
+
+
+def render_key(config: CalConfig, appointments: Iterable, today: date) -> str:
+    """Digest of everything a rendered month depends on. appointments are the
+    ones of the month in input order, which decides their order on a day."""
+    digest = hashlib.sha256()
+    font = config.font
+    settings = rendered_settings(config)
+    digest.update(
+        repr(
+            (
+                settings,
+                # without a file only good for this process, render skips the cache
+                str(font_file(font) or id(font)),
+                font.size,
+                getattr(font, "index", 0),
+                calendar.firstweekday(),
+                today.isoformat(),
+            )
+        ).encode()
+    )
+    for app in appointments:
+        digest.update(
+            repr((app.start.isoformat(), app.end.isoformat(), app.summary)).encode()
+        )
+    return digest.hexdigest()
+
+
+def evict_lru(directory: Path, pattern: str, max_bytes: int, keep: Optional[Path] = None) -> None:
+    """Removes the files matching pattern with the oldest modification time
+    until the rest holds at most max_bytes, but never keep"""
+    entries = []
+    for path in Path(directory).glob(pattern):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        if path == keep:
+            continue
+        path.unlink(missing_ok=True)
+        total -= size
+
+
+class RenderResult(NamedTuple):
+    "Where the encoded image is and if it came from the cache"
+
+    path: Path
+    hit: bool
+
+
+class RenderCache:
+    """Encoded renders on disk by render_key. The least recently used files
+    are removed once the directory holds more than max_bytes."""
+
+    def __init__(self, directory: Path, max_bytes: int) -> None:
+        self._directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = Lock()
+
+    def path(self, key: str) -> Path:
+        return self._directory / f"render-{key}.png"
+
+    def get(self, key: str) -> Optional[Path]:
+        path = self.path(key)
+        try:
+            # the modification time is the last use, for eviction
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key: str, source: Path) -> Path:
+        "Moves the encoded file at source into the cache"
+        path = self.path(key)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        os.replace(source, path)
+        self.evict(keep=path)
+        return path
+
+    def evict(self, keep: Optional[Path] = None) -> None:
+        "Removes the least recently used renders, but never keep"
+        with self._lock:
+            evict_lru(self._directory, "render-*.png", self.max_bytes, keep)
+
+    def size(self) -> int:
+        return sum(path.stat().st_size for path in self._directory.glob("render-*.png"))
+
+
+def copy_render(source: Path, target: Path) -> None:
+    """Puts a cached render at target. It is copied, not linked, as writing to
+    target later must not change the cached file. A target with the same
+    content is left alone, replacing a file can make the filesystem flush it."""
+    source, target = Path(source), Path(target)
+    if source == target or (target.is_file() and filecmp.cmp(source, target, shallow=False)):
+        return
+    tmp_path = target.with_name(target.name + ".tmp")
+    shutil.copyfile(source, tmp_path)
+    os.replace(tmp_path, target)
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, FrozenSet, List, Tuple
+
+from PIL import ImageDraw
+
+from magic_calender.instrument import INSTRUMENT
+
+
+def _bounds(xy: Any, grow: int = 0) -> Tuple[int, int, int, int]:
+    "Bounding box of the xy forms ImageDraw accepts"
+    coords = []
+    for item in xy:
+        if isinstance(item, (tuple, list)):
+            coords.extend(item)
+        else:
+            coords.append(item)
+    xs, ys = coords[0::2], coords[1::2]
+    return (
+        int(min(xs)) - grow,
+        int(min(ys)) - grow,
+        int(max(xs)) + grow,
+        int(max(ys)) + grow,
+    )
+
+
+class RecordingDraw:
+    """Forwards drawing calls to an ImageDraw, counts them as draw_primitives
+    and keeps the bounding box of everything drawn. A dry recorder only
+    measures."""
+
+    def __init__(self, img: ImageDraw.ImageDraw, dry: bool = False) -> None:
+        self._img = img
+        self._dry = dry
+        self.boxes: List[Tuple[int, int, int, int]] = []
+
+    def text(self, xy, text, fill=None, font=None, **kwargs) -> None:
+        bbox = self._img.textbbox(xy, text, font=font)
+        self.boxes.append(tuple(int(v) for v in bbox))
+        if not self._dry:
+            INSTRUMENT.count("draw_primitives")
+            self._img.text(xy, text, fill, font, **kwargs)
+
+    def line(self, xy, fill=None, width=1, **kwargs) -> None:
+        self.boxes.append(_bounds(xy, width))
+        if not self._dry:
+            INSTRUMENT.count("draw_primitives")
+            self._img.line(xy, fill, width, **kwargs)
+
+    def _shape(self, name: str, xy, *args, **kwargs) -> None:
+        self.boxes.append(_bounds(xy, kwargs.get("width", 1)))
+        if not self._dry:
+            INSTRUMENT.count("draw_primitives")
+            getattr(self._img, name)(xy, *args, **kwargs)
+
+    def rectangle(self, xy, *args, **kwargs) -> None:
+        self._shape("rectangle", xy, *args, **kwargs)
+
+    def rounded_rectangle(self, xy, *args, **kwargs) -> None:
+        self._shape("rounded_rectangle", xy, *args, **kwargs)
+
+    def ellipse(self, xy, *args, **kwargs) -> None:
+        self._shape("ellipse", xy, *args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._img, name)
+
+
+@dataclass(frozen=True)
+class DrawnState:
+    "What a header or day was drawn from and the grid cells it covered"
+
+    signature: Any
+    cells: FrozenSet[Tuple[int, int]]
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import hashlib
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Condition
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+from magic_calender.config import CalConfig
+from magic_calender.encoding import PNG_PROFILES
+from magic_calender.instrument import INSTRUMENT
+from magic_calender.magic_calender import MagicCalender
+
+# path -> format, "/" serves the png
+ROUTES = {"/": "png", "/calender.png": "png", "/calender.epd": "epd"}
+CONTENT_TYPES = {"png": "image/png", "epd": "application/octet-stream"}
+
+
+class Rendered(NamedTuple):
+    "One encoded image with its strong ETag"
+
+    body: bytes
+    etag: str
+    content_type: str
+
+
+def etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(header: Optional[str], tag: str) -> bool:
+    "If-None-Match uses the weak comparison, W/ prefixes are ignored"
+    if not header:
+        return False
+    tags = [part.strip() for part in header.split(",")]
+    return "*" in tags or any(part.removeprefix("W/") == tag for part in tags)
+
+
+class CalenderService:
+    """Renders on demand for the http server. A render is reused for
+    serve_max_age_s, requests arriving while one runs wait for it instead of
+    starting their own, and formats are only encoded again when the image
+    changed."""
+
+    def __init__(
+        self,
+        config: CalConfig,
+        events: Optional[Callable[[], List[Any]]] = None,
+        now: Callable[[], datetime] = datetime.now,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._events = events
+        self._now = now
+        self._clock = clock
+        self.calender = MagicCalender(config)
+        self._cond = Condition()
+        self._busy = False
+        self._rendered_at: Optional[float] = None
+        self._encoded: Dict[str, Rendered] = {}
+        self.renders = 0
+
+    def _fresh(self) -> bool:
+        max_age = self.calender._config.serve_max_age_s
+        return self._rendered_at is not None and self._clock() - self._rendered_at < max_age
+
+    def get(self, fmt: str) -> Rendered:
+        with self._cond:
+            while self._busy:
+                self._cond.wait()
+            if self._fresh() and fmt in self._encoded:
+                return self._encoded[fmt]
+            self._busy = True
+        try:
+            if not self._fresh():
+                self._render()
+            if fmt not in self._encoded:
+                self._encoded[fmt] = self._encode(fmt)
+            return self._encoded[fmt]
+        finally:
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+    def _render(self) -> None:
+        today = self._now().date()
+        self.calender.set_month(today.year, today.month)
+        self.calender.load(self._events() if self._events else None)
+        _, dirty = self.calender.draw_incremental()
+        self._rendered_at = self._clock()
+        self.renders += 1
+        INSTRUMENT.count("server_renders")
+        if dirty:
+            self._encoded = {}
+
+    def _encode(self, fmt: str) -> Rendered:
+        if fmt == "epd":
+            frame = self.calender.to_epaper()
+            body = bytes(frame.black) + bytes(frame.red)
+        else:
+            # the route promises a png, other profiles fall back to the plain one
+            profile = self.calender._config.encode_profile
+            body = self.calender.to_bytes(profile if profile in PNG_PROFILES else "png")
+        return Rendered(body, etag(body), CONTENT_TYPES[fmt])
+
+
+def _handler(service: CalenderService) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            self._respond(body=True)
+
+        def do_HEAD(self) -> None:
+            self._respond(body=False)
+
+        def _respond(self, body: bool) -> None:
+            fmt = ROUTES.get(self.path.split("?", 1)[0])
+            if fmt is None:
+                self.send_error(404)
+                return
+            try:
+                rendered = service.get(fmt)
+            except Exception as exc:  # a failed render must not end the server
+                print(f"An error occurred: {exc}")
+                self.send_error(503)
+                return
+            if etag_matches(self.headers.get("If-None-Match"), rendered.etag):
+                self.send_response(304)
+                self.send_header("ETag", rendered.etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", rendered.content_type)
+            self.send_header("Content-Length", str(len(rendered.body)))
+            self.send_header("ETag", rendered.etag)
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            if body:
+                self.wfile.write(rendered.body)
+
+        def log_message(self, format: str, *args) -> None:
+            INSTRUMENT.count("server_requests")
+
+    return Handler
+
+
+def make_server(
+    config: CalConfig,
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    events: Optional[Callable[[], List[Any]]] = None,
+) -> ThreadingHTTPServer:
+    """Http server for the current render, port 0 picks a free one. Call
+    serve_forever on it, the service is kept as server.service."""
+    service = CalenderService(config, events)
+    server = ThreadingHTTPServer((host, port), _handler(service))
+    server.daemon_threads = True
+    server.service = service
+    return server
@@ -0,0 +1,398 @@
+from __future__ import annotations
+
+import json
+import mmap
+import re
+from abc import ABC, abstractmethod
+from datetime import date, datetime, time, timedelta, tzinfo
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple, Union
+
+import pytz
+
+# RFC 5545 continues a long line on the next one, starting with a blank
+_FOLD = re.compile(r"\r?\n[ \t]")
+_DURATION = re.compile(
+    r"(?P<sign>[+-])?P(?:(?P<weeks>\d+)W)?(?:(?P<days>\d+)D)?"
+    r"(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?"
+)
+_UNESCAPE = re.compile(r"\\([\\;,nN])")
+# just the days of start, end and the replaced occurrence, and if there are
+# recurrences, read from the raw feed
+_BOUNDS = re.compile(
+    rb"^(?:(DTSTART|DTEND|RECURRENCE-ID)[^:\r\n]*:(\d{4})(\d\d)(\d\d)|(RRULE|RDATE)[;:])",
+    re.MULTILINE,
+)
+_UNTIL = re.compile(r"(UNTIL=)([0-9TZ]+)", re.IGNORECASE)
+# events are matched by date, times in other zones may be off by a day
+_SLACK = timedelta(days=1)
+
+
+class EventSource(ABC):
+    """Yields Google Calendar shaped events, dicts with id, summary, start and
+    end, for MagicCalender.load. Sources may yield events outside of the
+    asked days, but never have to keep all events in memory."""
+
+    @abstractmethod
+    def events(self, first: date, last: date) -> Iterator[Dict[str, Any]]:
+        "Events overlapping first to last, both included"
+
+
+def _day(value: Dict[str, str]) -> date:
+    return date.fromisoformat((value.get("date") or value["dateTime"])[:10])
+
+
+def overlaps(event: Dict[str, Any], first: date, last: date) -> bool:
+    try:
+        return _day(event["start"]) <= last + _SLACK and _day(event["end"]) >= first - _SLACK
+    except (KeyError, TypeError, ValueError):
+        # let loading the appointment report what is wrong with it
+        return True
+
+
+class GoogleSource(EventSource):
+    "The calendars of the signed in Google account"
+
+    def __init__(self, calender) -> None:
+        self._calender = calender
+
+    def events(self, first: date, last: date) -> Iterator[Dict[str, Any]]:
+        time_min, time_max = self._calender.month_range(
+            first.year, first.month, last.year, last.month
+        )
+        return iter(self._calender.get_events_api(time_min, time_max))
+
+
+class ListSource(EventSource):
+    "Events already in memory"
+
+    def __init__(self, events: Iterable[Dict[str, Any]]) -> None:
+        self._events = events
+
+    def events(self, first: date, last: date) -> Iterator[Dict[str, Any]]:
+        return (event for event in self._events if overlaps(event, first, last))
+
+
+class JsonSource(EventSource):
+    """A json dump, a list of events or an events.list page with items. The
+    file is read whole, use JsonLinesSource for large dumps."""
+
+    def __init__(self, path: Path) -> None:
+        self._path = Path(path)
+
+    def events(self, first: date, last: date) -> Iterator[Dict[str, Any]]:
+        with self._path.open("r") as file:
+            data = json.load(file)
+        items = data.get("items", []) if isinstance(data, dict) else data
+        return ListSource(items).events(first, last)
+
+
+class JsonLinesSource(EventSource):
+    "One json event per line, read line by line"
+
+    def __init__(self, path: Path) -> None:
+        self._path = Path(path)
+
+    def events(self, first: date, last: date) -> Iterator[Dict[str, Any]]:
+        with self._path.open("r") as file:
+            for line in file:
+                if line.strip():
+                    event = json.loads(line)
+                    if overlaps(event, first, last):
+                        yield event
+
+
+Moment = Union[date, datetime]
+Properties = Dict[str, List[Tuple[Dict[str, str], str]]]
+
+
+def _properties(block: str) -> Properties:
+    "Values and parameters of every property of an event, alarms left out"
+    properties: Properties = {}
+    nested = 0
+    for line in _FOLD.sub("", block).splitlines():
+        if line.startswith("BEGIN:"):
+            nested += 1
+            continue
+        if line.startswith("END:"):
+            nested -= 1
+            continue
+        if nested > 1:
+            continue
+        head, _, value = line.partition(":")
+        # a quoted parameter value may contain a colon
+        while head.count('"') % 2 and value:
+            extra, _, value = value.partition(":")
+            head += ":" + extra
+        name, *params = head.split(";")
+        properties.setdefault(name.upper(), []).append(
+            (dict(param.partition("=")[::2] for param in params), value)
+        )
+    return properties
+
+
+def _value(properties: Properties, name: str) -> str:
+    "First value of a property, empty when it isn't there"
+    return properties[name][0][1].strip() if name in properties else ""
+
+
+def _zone(params: Dict[str, str], value: str) -> Optional[tzinfo]:
+    "Zone of a date-time, None for dates and floating times"
+    if value.strip().endswith("Z"):
+        return pytz.UTC
+    tzid = params.get("TZID", "").strip('"')
+    if tzid:
+        try:
+            return pytz.timezone(tzid)
+        except pytz.UnknownTimeZoneError:
+            pass
+    return None
+
+
+def _moment(params: Dict[str, str], value: str) -> Moment:
+    "An ics date or date-time, date-times with a known zone are aware"
+    value = value.strip()
+    if params.get("VALUE") == "DATE" or len(value) == 8:
+        return date(int(value[:4]), int(value[4:6]), int(value[6:8]))
+    moment = datetime.strptime(value.rstrip("Z")[:15], "%Y%m%dT%H%M%S")
+    zone = _zone(params, value)
+    # floating time, shown as it is in the configured timezone
+    return zone.localize(moment) if zone else moment
+
+
+def _moments(values: List[Tuple[Dict[str, str], str]]) -> List[Moment]:
+    "Every moment of a list property like RDATE or EXDATE, which may repeat"
+    return [
+        _moment(params, part)
+        for params, value in values
+        for part in value.split(",")
+        if part.strip() and params.get("VALUE") != "PERIOD"
+    ]
+
+
+def _google(moment: Moment) -> Dict[str, str]:
+    "Google shaped start or end"
+    if not isinstance(moment, datetime):
+        return {"date": moment.isoformat()}
+    if moment.tzinfo is pytz.UTC:
+        return {"dateTime": moment.replace(tzinfo=None).isoformat() + "Z"}
+    return {"dateTime": moment.isoformat()}
+
+
+def _canonical(moment: Moment) -> Moment:
+    "Comparable form of an occurrence, aware times in UTC"
+    if isinstance(moment, datetime) and moment.tzinfo is not None:
+        return moment.astimezone(pytz.UTC)
+    return moment
+
+
+def _stamp(moment: Moment) -> str:
+    "Occurrence part of the id of one instance of a recurring event"
+    moment = _canonical(moment)
+    if not isinstance(moment, datetime):
+        return moment.strftime("%Y%m%d")
+    return moment.strftime("%Y%m%dT%H%M%S") + ("Z" if moment.tzinfo else "")
+
+
+def _duration(value: str) -> timedelta:
+    match = _DURATION.fullmatch(value.strip())
+    if not match:
+        return timedelta()
+    parts = {name: int(amount or 0) for name, amount in match.groupdict().items() if name != "sign"}
+    duration = timedelta(**parts)
+    return -duration if match.group("sign") == "-" else duration
+
+
+def _unescape(value: str) -> str:
+    return _UNESCAPE.sub(lambda match: "\n" if match.group(1) in "nN" else match.group(1), value)
+
+
+class VEvent(NamedTuple):
+    "The parts of a VEVENT the calender uses"
+
+    uid: str
+    summary: str
+    start: Moment
+    end: Moment
+    # zone the start is given in, recurrences follow its wall clock
+    zone: Optional[tzinfo]
+    cancelled: bool
+    # set on an occurrence of a recurring event that was moved or changed
+    recurrence_id: Optional[Moment]
+    rules: List[str]
+    rdates: List[Moment]
+    exdates: List[Moment]
+
+    def event(self, start: Optional[Moment] = None, end: Optional[Moment] = None) -> Dict[str, Any]:
+        "Google shaped event, of one occurrence when start and end are given"
+        occurrence = start if start is not None else self.recurrence_id
+        return {
+            # occurrences share the UID of their series
+            "id": f"{self.uid}_{_stamp(occurrence)}" if occurrence is not None else self.uid or None,
+            "summary": self.summary,
+            "start": _google(self.start if start is None else start),
+            "end": _google(self.end if end is None else end),
+        }
+
+    def occurrences(self, first: date, last: date) -> Iterator[Tuple[Moment, Moment]]:
+        """Start and end of every occurrence of the series that may overlap
+        first to last. Rules are expanded on the wall clock of the start,
+        a meeting stays at 9:00 when daylight saving time begins."""
+        # only recurring events are expanded, dateutil isn't needed otherwise
+        from dateutil.rrule import rruleset, rrulestr
+
+        all_day = not isinstance(self.start, datetime)
+
+        def wall(moment: Moment) -> datetime:
+            if not isinstance(moment, datetime):
+                return datetime.combine(moment, time())
+            if all_day:
+                return datetime.combine(moment.date(), time())
+            if moment.tzinfo is not None:
+                moment = moment.astimezone(self.zone or pytz.UTC)
+            return moment.replace(tzinfo=None)
+
+        def until(match: "re.Match[str]") -> str:
+            # dateutil wants UNTIL the way DTSTART is given, both naive here
+            moment = wall(_moment({}, match.group(2)))
+            return match.group(1) + moment.strftime("%Y%m%d" if all_day else "%Y%m%dT%H%M%S")
+
+        def moment(value: datetime) -> Moment:
+            if all_day:
+                return value.date()
+            return self.zone.localize(value) if self.zone else value
+
+        start = wall(self.start)
+        duration = wall(self.end) - start
+        series = rruleset()
+        # the start is always the first occurrence, even when no rule matches it
+        series.rdate(start)
+        try:
+            for rule in self.rules:
+                series.rrule(rrulestr(_UNTIL.sub(until, rule), dtstart=start))
+        except (KeyError, ValueError):
+            # a rule that can't be read leaves the first occurrence
+            pass
+        for rdate in self.rdates:
+            series.rdate(wall(rdate))
+        for exdate in self.exdates:
+            series.exdate(wall(exdate))
+        after = datetime.combine(first, time()) - _SLACK - duration
+        before = datetime.combine(last, time()) + timedelta(days=1) + _SLACK
+        for occurrence in series.between(after, before, inc=True):
+            yield moment(occurrence), moment(occurrence + duration)
+
+
+def _vevent(block: str) -> Optional[VEvent]:
+    properties = _properties(block)
+    if "DTSTART" not in properties:
+        return None
+    params, value = properties["DTSTART"][0]
+    start = _moment(params, value)
+    if "DTEND" in properties:
+        end = _moment(*properties["DTEND"][0])
+    elif "DURATION" in properties:
+        end = start + _duration(_value(properties, "DURATION"))
+        if isinstance(end, datetime) and end.tzinfo is not None:
+            end = end.tzinfo.normalize(end)
+    else:
+        # a date lasts the day, a date-time is a point in time
+        end = start if isinstance(start, datetime) else start + timedelta(days=1)
+    recurrence = properties.get("RECURRENCE-ID")
+    return VEvent(
+        uid=_value(properties, "UID"),
+        summary=_unescape(properties["SUMMARY"][0][1]) if "SUMMARY" in properties else "",
+        start=start,
+        end=end,
+        zone=None if not isinstance(start, datetime) else _zone(params, value),
+        cancelled=_value(properties, "STATUS").upper() == "CANCELLED",
+        recurrence_id=_moment(*recurrence[0]) if recurrence else None,
+        rules=[value.strip() for _, value in properties.get("RRULE", [])],
+        rdates=_moments(properties.get("RDATE", [])),
+        exdates=_moments(properties.get("EXDATE", [])),
+    )
+
+
+class IcsSource(EventSource):
+    """An iCalendar feed read through a memory map, one VEVENT at a time.
+    Only events that may overlap the asked days are parsed, so memory stays
+    the same however large the feed is. Recurring events are expanded into
+    the occurrences within the days, without the EXDATEs and with moved
+    occurrences in place of the ones they replace."""
+
+    def __init__(self, path: Path) -> None:
+        self._path = Path(path)
+
+    def events(self, first: date, last: date) -> Iterator[Dict[str, Any]]:
+        with self._path.open("rb") as file:
+            if self._path.stat().st_size == 0:
+                return
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as feed:
+                yield from self._events(feed, first, last)
+
+    def _events(self, feed: mmap.mmap, first: date, last: date) -> Iterator[Dict[str, Any]]:
+        # a moved occurrence may come before or after its series in the feed,
+        # occurrences are held back until all of them are known
+        occurrences: List[Tuple[str, Moment, Dict[str, Any]]] = []
+        moved: Set[Tuple[str, Moment]] = set()
+        position = 0
+        while (start := feed.find(b"BEGIN:VEVENT", position)) != -1:
+            end = feed.find(b"END:VEVENT", start)
+            if end == -1:
+                break
+            position = end + len(b"END:VEVENT")
+            if self._outside(feed, start, end, first, last):
+                continue
+            vevent = _vevent(feed[start:end].decode("utf-8", "replace"))
+            if vevent is None:
+                continue
+            if vevent.recurrence_id is not None:
+                moved.add((vevent.uid, _canonical(vevent.recurrence_id)))
+            if vevent.cancelled:
+                continue
+            if vevent.recurrence_id is None and (vevent.rules or vevent.rdates):
+                for begin, finish in vevent.occurrences(first, last):
+                    event = vevent.event(begin, finish)
+                    if overlaps(event, first, last):
+                        occurrences.append((vevent.uid, _canonical(begin), event))
+                continue
+            event = vevent.event()
+            if overlaps(event, first, last):
+                yield event
+        for uid, begin, event in occurrences:
+            if (uid, begin) not in moved:
+                yield event
+
+    @staticmethod
+    def _outside(feed: mmap.mmap, start: int, end: int, first: date, last: date) -> bool:
+        """If a VEVENT can't overlap first to last, read from the raw bytes.
+        False when it has to be parsed to know."""
+        days: Dict[bytes, date] = {}
+        recurs = False
+        for match in _BOUNDS.finditer(feed, start, end):
+            name, *parts, rule = match.groups()
+            if rule:
+                recurs = True
+            else:
+                days.setdefault(name, date(*map(int, parts)))
+        low, high = first - _SLACK, last + _SLACK
+        # a moved occurrence also has to be read when it moved away from the days
+        recurrence = days.get(b"RECURRENCE-ID")
+        if recurrence and low <= recurrence <= high:
+            return False
+        if b"DTSTART" in days and days[b"DTSTART"] > high:
+            # nothing of an event or series is before its start
+            return True
+        if recurs or b"DTSTART" not in days or b"DTEND" not in days:
+            return False
+        return days[b"DTEND"] < low
+
+
+def source_for(path: Path) -> EventSource:
+    "Source reading the file by its suffix, .ics, .jsonl or json"
+    suffix = Path(path).suffix.lower()
+    if suffix in (".ics", ".ical"):
+        return IcsSource(path)
+    if suffix in (".jsonl", ".ndjson"):
+        return JsonLinesSource(path)
+    return JsonSource(path)
@@ -0,0 +1,77 @@
+import threading
+import time
+
+
+class FakeRequest:
+    """Stand in for a googleapiclient request, optionally tracking how many
+    run at once on a FakeService"""
+
+    def __init__(self, result=None, error=None, service=None):
+        self._result = result
+        self._error = error
+        self._service = service
+
+    def execute(self, http=None):
+        if self._service:
+            self._service.enter()
+        if self._error:
+            raise self._error
+        return self._result
+
+
+class FakeEvents:
+    def __init__(self, service):
+        self._service = service
+
+    def list(self, calendarId, pageToken=None, **kwargs):
+        self._service.event_params = kwargs
+        page = int(pageToken or 0)
+        result = {
+            "items": [
+                {
+                    "id": f"{calendarId}-{page}-{i}",
+                    "summary": f"{calendarId} {page} {i}",
+                    "start": {"date": "2023-12-06"},
+                    "end": {"date": "2023-12-07"},
+                }
+                for i in range(self._service.per_page)
+            ]
+        }
+        if page + 1 < self._service.pages:
+            result["nextPageToken"] = str(page + 1)
+        return FakeRequest(result, service=self._service)
+
+
+class FakeService:
+    "Local stand in for the calendar service, one calendar per list page"
+
+    def __init__(self, calendars=6, pages=3, per_page=4, latency=0.05, calendar_ids=None):
+        self.lock = threading.Lock()
+        self.latency = latency
+        self.in_flight = self.max_in_flight = self.calls = 0
+        self.calendar_ids = calendar_ids or [f"cal{page}" for page in range(calendars)]
+        self.pages = pages
+        self.per_page = per_page
+
+    def enter(self):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.latency)
+        with self.lock:
+            self.in_flight -= 1
+            self.calls += 1
+
+    def calendarList(self):
+        return self
+
+    def events(self):
+        return FakeEvents(self)
+
+    def list(self, pageToken=None, **params):
+        self.list_params = params
+        page = int(pageToken or 0)
+        result = {"items": [{"id": self.calendar_ids[page]}]}
+        if page + 1 < len(self.calendar_ids):
+            result["nextPageToken"] = str(page + 1)
+        return FakeRequest(result, service=self)
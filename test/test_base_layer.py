@@ -0,0 +1,122 @@
+import os
+from datetime import date
+from io import BytesIO
+from unittest import mock
+
+import pytest
+from PIL import ImageFont
+
+from core.grid import Grid
+from magic_calender.base_layer import BASE_LAYERS, base_layer_key
+from magic_calender.magic_calender import MagicCalender as mc
+
+
+@pytest.fixture
+def today():
+    BASE_LAYERS.clear()
+    with mock.patch("magic_calender.magic_calender.date", wraps=date) as mock_date:
+        mock_date.today.return_value = date(2023, 12, 6)
+        yield mock_date
+    BASE_LAYERS.clear()
+
+
+def _render(config, events):
+    mcal = mc(config)
+    mcal.load(events)
+    mcal.draw()
+    return mcal
+
+
+def test_base_layer_same_pixels(example_config, example_json, today):
+    expected = _render(example_config, example_json)._img.tobytes()
+    example_config.cache_base_layer = True
+    assert _render(example_config, example_json)._img.tobytes() == expected
+    with mock.patch.object(Grid, "draw") as grid_draw:
+        assert _render(example_config, example_json)._img.tobytes() == expected
+    grid_draw.assert_not_called()
+
+
+def test_base_layer_on_disk(example_config, example_json, today, tmp_path):
+    example_config.cache_base_layer = True
+    example_config.cache_dir = tmp_path
+    expected = _render(example_config, example_json)._img.tobytes()
+    assert len(list(tmp_path.glob("base-*.png"))) == 1
+    BASE_LAYERS.clear()
+    with mock.patch.object(Grid, "draw") as grid_draw:
+        assert _render(example_config, example_json)._img.tobytes() == expected
+    grid_draw.assert_not_called()
+
+
+
+def test_base_layer_corrupt_file(example_config, example_json, today, tmp_path):
+    example_config.cache_base_layer = True
+    example_config.cache_dir = tmp_path
+    expected = _render(example_config, example_json)._img.tobytes()
+    (path,) = tmp_path.glob("base-*.png")
+    path.write_bytes(path.read_bytes()[:100])
+    BASE_LAYERS.clear()
+    assert _render(example_config, example_json)._img.tobytes() == expected
+    assert path.stat().st_size > 100
+    assert list(tmp_path.glob("*.tmp")) == []
+
+
+def test_base_layer_font_from_bytes(example_config, example_json, today, tmp_path):
+    example_config.cache_base_layer = True
+    example_config.cache_dir = tmp_path
+    with open(example_config.font.path, "rb") as file:
+        example_config.font = ImageFont.truetype(BytesIO(file.read()), example_config.font.size)
+    expected = _render(example_config, example_json)._img.tobytes()
+    # an id() names nothing in another process, the layer stays in memory
+    assert list(tmp_path.glob("base-*.png")) == []
+    with mock.patch.object(Grid, "draw") as grid_draw:
+        assert _render(example_config, example_json)._img.tobytes() == expected
+    grid_draw.assert_not_called()
+
+
+def test_base_layer_disk_is_bounded(example_config, example_json, today, tmp_path):
+    example_config.cache_base_layer = True
+    example_config.cache_dir = tmp_path
+    _render(example_config, example_json)
+    (first,) = tmp_path.glob("base-*.png")
+    # room for about two layers
+    example_config.render_cache_bytes = first.stat().st_size * 5 // 2
+    os.utime(first, (0, 0))
+    for day in (7, 8, 9):
+        today.today.return_value = date(2023, 12, day)
+        _render(example_config, example_json)
+    layers = list(tmp_path.glob("base-*.png"))
+    assert len(layers) == 2 and first not in layers
+
+def test_base_layer_key(example_config):
+    key = base_layer_key(example_config, 6)
+    assert key == base_layer_key(example_config, 6)
+    assert key != base_layer_key(example_config, 7)
+    example_config.appointment_spacing_px += 1
+    assert key == base_layer_key(example_config, 6)
+    example_config.number_size += 1
+    assert key != base_layer_key(example_config, 6)
+
+
+def test_base_layer_incremental(example_config, example_json, today):
+    example_config.cache_base_layer = True
+    mcal = _render(example_config, example_json)
+    events = example_json + [
+        {
+            "id": "new-event",
+            "summary": "Added event",
+            "start": {"dateTime": "2023-12-20T10:00:00Z"},
+            "end": {"dateTime": "2023-12-20T11:00:00Z"},
+        }
+    ]
+    mcal.load(events)
+    img, dirty = mcal.draw_incremental()
+    assert len(dirty) == 1
+    example_config.cache_base_layer = False
+    assert img.tobytes() == _render(example_config, events)._img.tobytes()
+
+    example_config.cache_base_layer = True
+    today.today.return_value = date(2023, 12, 7)
+    img, dirty = mcal.draw_incremental()
+    assert dirty[0].width == example_config.width - 1
+    example_config.cache_base_layer = False
+    assert img.tobytes() == _render(example_config, events)._img.tobytes()
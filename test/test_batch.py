@@ -0,0 +1,65 @@
+import copy
+import json
+from datetime import date
+
+from magic_calender.__main__ import main
+from magic_calender.batch import months_between, render_month, render_range, split_by_month
+
+
+def _events_over_months(example_json):
+    events = copy.deepcopy(example_json)
+    events += [
+        {
+            "id": "november",
+            "summary": "November event",
+            "start": {"dateTime": "2023-11-14T10:00:00Z"},
+            "end": {"dateTime": "2023-11-14T12:00:00Z"},
+        },
+        {
+            "id": "new-year",
+            "summary": "Holidays",
+            "start": {"date": "2023-12-28"},
+            "end": {"date": "2024-01-03"},
+        },
+    ]
+    return events
+
+
+def test_months_between():
+    assert months_between(date(2023, 11, 5), date(2024, 2, 1)) == [
+        (2023, 11),
+        (2023, 12),
+        (2024, 1),
+        (2024, 2),
+    ]
+
+
+def test_split_by_month(example_json):
+    buckets = split_by_month(_events_over_months(example_json), months_between(date(2023, 11, 1), date(2024, 1, 1)))
+    assert [e["id"] for e in buckets[(2023, 11)]] == ["november"]
+    assert "new-year" in [e["id"] for e in buckets[(2023, 12)]]
+    assert "new-year" in [e["id"] for e in buckets[(2024, 1)]]
+
+
+def test_render_range_matches_single_months(example_config, example_json, tmp_path):
+    events = _events_over_months(example_json)
+    paths = list(
+        render_range(
+            date(2023, 11, 1), date(2024, 1, 1), tmp_path / "batch",
+            config=example_config, events=events, processes=2,
+        )
+    )
+    assert sorted(p.name for p in paths) == ["2023-11.png", "2023-12.png", "2024-01.png"]
+    buckets = split_by_month(events, months_between(date(2023, 11, 1), date(2024, 1, 1)))
+    for year, month in buckets:
+        example_config.year, example_config.month = year, month
+        single = render_month(example_config, buckets[(year, month)], tmp_path / "single.png")
+        assert single.read_bytes() == (tmp_path / "batch" / f"{year}-{month:02}.png").read_bytes()
+
+
+def test_main_range(example_json, tmp_path, capsys):
+    (events_file := tmp_path / "events.json").write_text(json.dumps(example_json))
+    main(["--range", "2023-12", "2024-01", "--out", str(tmp_path), "--events", str(events_file)])
+    assert (tmp_path / "2023-12.png").is_file()
+    assert (tmp_path / "2024-01.png").is_file()
+    assert "2024-01.png" in capsys.readouterr().out
@@ -0,0 +1,99 @@
+import json
+
+from bench import (
+    compare_ingest,
+    compare_payload,
+    encode_profiles,
+    generate_events,
+    layout_appointments,
+    run,
+)
+from bench.__main__ import main
+from bench.feeds import ics_memory
+from bench.payload import apply_mask, parse_mask, recorded_page
+from bench.stages import STAGES
+from magic_calender.core.appointment import Appointment
+
+
+def test_generate_events():
+    events = generate_events(
+        200, 2023, 12, multiday_share=0.5, all_day_share=0.25, calendars=4, seed=3
+    )
+    assert events == generate_events(
+        200, 2023, 12, multiday_share=0.5, all_day_share=0.25, calendars=4, seed=3
+    )
+    assert len({event["id"] for event in events}) == 200
+    assert {event["id"].split("-")[0] for event in events} == {"cal0", "cal1", "cal2", "cal3"}
+    appointments = [Appointment(event) for event in events]
+    assert all(a.start.year == 2023 and a.start.month == 12 for a in appointments)
+    multiday = sum(a.multiday for a in appointments)
+    timed = sum("dateTime" in event["start"] for event in events)
+    assert 70 < multiday < 130
+    assert 25 < timed < 75
+
+
+def test_summary_length():
+    events = generate_events(50, 2023, 12, summary_length=(3, 8))
+    assert all(3 <= len(event["summary"]) <= 8 for event in events)
+
+
+def test_run(example_config):
+    report = run([0, 10], repeat=1, config=example_config)
+    assert [result["events"] for result in report["results"]] == [0, 10]
+    for result in report["results"]:
+        assert tuple(result["stages"]) == STAGES
+        assert all(stage["min_s"] >= 0 for stage in result["stages"].values())
+    json.dumps(report)
+
+
+def test_main(tmp_path):
+    out = tmp_path / "bench.json"
+    main(["--scales", "5", "--repeat", "1", "--year", "2023", "--month", "12", "--out", str(out)])
+    with out.open("r") as file:
+        report = json.load(file)
+    assert (report["year"], report["month"]) == (2023, 12)
+    assert report["results"][0]["events"] == 5
+
+
+def test_layout_appointments(example_config):
+    report = layout_appointments(20, repeat=1, config=example_config)
+    assert report["appointments"] == 20
+    # the month layout works on arrays, not on Boxes per appointment
+    assert report["boxes_per_appointment"] == 0
+    assert report["us_per_appointment"] > 0
+
+
+def test_compare_ingest():
+    report = compare_ingest(200, repeat=1)
+    for name in ("legacy", "ingest"):
+        assert report[name]["events_per_s"] > 0
+    # the old class keeps every raw event alive
+    assert report["ingest"]["bytes_per_appointment"] < report["legacy"]["bytes_per_appointment"]
+
+
+def test_encode_profiles(example_config):
+    report = encode_profiles(20, repeat=1, config=example_config)
+    profiles = report["profiles"]
+    assert profiles["raw"]["bytes"] == example_config.width * example_config.height * 4
+    assert profiles["png-palette"]["bytes"] < profiles["png"]["bytes"]
+    assert all(profile["encode_s"] > 0 for profile in profiles.values())
+
+
+def test_compare_payload():
+    report = compare_payload(30, repeat=1)
+    assert report["masked"]["bytes_per_1k"] < report["full"]["bytes_per_1k"] / 3
+    assert report["masked"]["parse_ms_per_1k"] > 0
+
+
+def test_apply_mask():
+    page = recorded_page(4)
+    masked = apply_mask(page, parse_mask("nextSyncToken,items(id,start/dateTime,summary)"))
+    assert set(masked) == {"nextSyncToken", "items"}
+    assert all(set(item) == {"id", "start", "summary"} for item in masked["items"])
+
+
+def test_ics_memory_is_flat():
+    small, large = ics_memory((300, 3_000))["results"]
+    assert small["loaded"] > 0 and large["loaded"] > 0
+    assert large["feed_bytes"] > 9 * small["feed_bytes"]
+    assert large["peak_bytes"] < 2 * small["peak_bytes"]
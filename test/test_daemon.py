@@ -0,0 +1,89 @@
+from datetime import date, datetime
+from unittest import mock
+
+import httplib2
+from googleapiclient.errors import HttpError
+
+from magic_calender.daemon import RefreshDaemon
+
+from .conftest import FakeRequest, FakeService
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+
+
+def test_daemon_writes_only_changes(example_config, example_json, tmp_path):
+    clock = FakeClock(datetime(2023, 12, 6, 12, 0))
+    events = list(example_json)
+    daemon = RefreshDaemon(example_config, tmp_path / "calender.png", lambda: events, clock, clock.sleep)
+    with mock.patch("magic_calender.magic_calender.date", wraps=date) as mock_date:
+        mock_date.today.return_value = date(2023, 12, 6)
+        assert daemon.refresh()
+        written = (tmp_path / "calender.png").read_bytes()
+        assert not daemon.refresh()
+        events.append(
+            {
+                "id": "new-event",
+                "summary": "Added event",
+                "start": {"dateTime": "2023-12-20T10:00:00Z"},
+                "end": {"dateTime": "2023-12-20T11:00:00Z"},
+            }
+        )
+        assert daemon.refresh()
+    assert (tmp_path / "calender.png").read_bytes() != written
+    assert daemon.writes == 2
+
+
+def test_daemon_rolls_over_month(example_config, example_json, tmp_path):
+    clock = FakeClock(datetime(2023, 12, 31, 23, 59, 30))
+    example_config.refresh_interval_s = 300
+    daemon = RefreshDaemon(example_config, tmp_path / "calender.png", lambda: example_json, clock, clock.sleep)
+    daemon.run(iterations=1)
+    assert daemon.calender._config.month == 12
+    assert 1 <= daemon.next_delay() <= 31
+    clock.now = datetime(2024, 1, 1, 0, 0, 1)
+    daemon.run(iterations=2)
+    assert (daemon.calender._config.year, daemon.calender._config.month) == (2024, 1)
+    assert daemon.calender._grid._cal[0][0] == 1
+    assert len(clock.slept) == 1
+    assert 300 - example_config.refresh_jitter_s <= clock.slept[0] <= 300 + example_config.refresh_jitter_s
+
+
+def test_daemon_survives_failed_refresh(example_config, tmp_path):
+    clock = FakeClock(datetime(2023, 12, 6, 12, 0))
+
+    def events():
+        raise OSError("network down")
+
+    daemon = RefreshDaemon(example_config, tmp_path / "calender.png", events, clock, clock.sleep)
+    daemon.run(iterations=2)
+    assert daemon.writes == 0
+    assert len(clock.slept) == 1
+
+
+def test_daemon_keeps_output_on_api_error(example_config, example_json, tmp_path):
+    class FailingService(FakeService):
+        def list(self, pageToken=None, **params):
+            return FakeRequest(error=HttpError(httplib2.Response({"status": 503}), b"Unavailable"))
+
+    clock = FakeClock(datetime(2023, 12, 6, 12, 0))
+    output = tmp_path / "calender.png"
+    daemon = RefreshDaemon(example_config, output, lambda: example_json, clock, clock.sleep)
+    assert daemon.refresh()
+    written = output.read_bytes()
+
+    daemon = RefreshDaemon(example_config, output, now=clock, sleep=clock.sleep)
+    daemon.calender._creds = object()
+    daemon.calender._service = FailingService(latency=0)
+    daemon.run(iterations=1)
+    assert daemon.writes == 0
+    assert output.read_bytes() == written
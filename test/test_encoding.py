@@ -0,0 +1,65 @@
+from io import BytesIO
+
+import pytest
+from PIL import Image
+
+from magic_calender.encoding import ENCODE_PROFILES, encode
+from magic_calender.magic_calender import MagicCalender as mc
+
+
+@pytest.fixture
+def drawn(example_config, example_json):
+    mcal = mc(example_config)
+    mcal.load(example_json)
+    mcal.draw()
+    return mcal
+
+
+def test_encode_profiles(drawn):
+    img = drawn._img
+    for profile in ENCODE_PROFILES:
+        data = drawn.to_bytes(profile)
+        if profile == "raw":
+            assert data == img.tobytes()
+            continue
+        with Image.open(BytesIO(data)) as decoded:
+            assert decoded.size == img.size
+            if profile in ("png", "png-fast"):
+                assert decoded.tobytes() == img.tobytes()
+            elif profile == "grayscale":
+                assert decoded.mode == "L"
+            else:
+                assert decoded.mode == "P"
+
+
+def test_default_save_unchanged(drawn, tmp_path):
+    expected = BytesIO()
+    drawn._img.save(expected, "PNG")
+    drawn.save(tmp_path / "calender.png")
+    assert (tmp_path / "calender.png").read_bytes() == expected.getvalue()
+
+
+def test_save_to_file_object(drawn):
+    buffer = BytesIO()
+    drawn.save(buffer, "png-fast")
+    assert buffer.getvalue() == drawn.to_bytes("png-fast")
+
+
+def test_config_profile(example_config, drawn):
+    example_config.encode_profile = "grayscale"
+    assert drawn.to_bytes() == drawn.to_bytes("grayscale")
+
+
+def test_save_async(drawn, tmp_path):
+    expected = drawn.to_bytes()
+    future = drawn.save_async()
+    # the encoder works on a copy, drawing on can't change what is written
+    drawn._id.rectangle((0, 0, 100, 100), fill=(255, 0, 0, 255))
+    assert future.result() == expected
+    drawn.save_async(tmp_path / "async.png").result()
+    assert (tmp_path / "async.png").is_file()
+
+
+def test_unknown_profile(drawn):
+    with pytest.raises(RuntimeError):
+        encode(drawn._img, "jpeg")
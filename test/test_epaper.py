@@ -0,0 +1,58 @@
+from PIL import Image
+
+from magic_calender.epaper import pack_planes
+from magic_calender.magic_calender import MagicCalender as mc
+
+
+def _bit(plane, width, x, y):
+    stride = (width + 7) // 8
+    return plane[y * stride + x // 8] >> (7 - x % 8) & 1
+
+
+def _sample():
+    img = Image.new("RGBA", (20, 3), (255, 255, 255, 255))
+    img.putpixel((0, 0), (0, 0, 0, 0))
+    img.putpixel((9, 1), (255, 0, 0, 255))
+    img.putpixel((19, 2), (120, 120, 120, 255))
+    img.putpixel((3, 0), (200, 40, 40, 255))
+    return img
+
+
+def test_pack_planes_nearest():
+    frame = pack_planes(_sample())
+    assert (frame.width, frame.height) == (20, 3)
+    assert len(frame.black) == len(frame.red) == 3 * 3
+    assert _bit(frame.black, 20, 0, 0) and not _bit(frame.red, 20, 0, 0)
+    assert _bit(frame.red, 20, 9, 1) and not _bit(frame.black, 20, 9, 1)
+    assert _bit(frame.red, 20, 3, 0)
+    assert not _bit(frame.black, 20, 1, 0) and not _bit(frame.red, 20, 1, 0)
+    assert sum(bin(b).count("1") for b in frame.black) + sum(bin(b).count("1") for b in frame.red) == 4
+
+
+def test_pack_planes_threshold():
+    frame = pack_planes(_sample(), threshold=128)
+    assert _bit(frame.black, 20, 0, 0)
+    assert _bit(frame.black, 20, 19, 2)
+    assert _bit(frame.red, 20, 9, 1) and not _bit(frame.black, 20, 9, 1)
+    assert _bit(frame.red, 20, 3, 0)
+    inverted = pack_planes(_sample(), threshold=128, inverted=True)
+    assert not _bit(inverted.black, 20, 0, 0) and _bit(inverted.black, 20, 1, 0)
+    assert not _bit(inverted.red, 20, 9, 1)
+
+
+def test_pack_planes_dither():
+    img = Image.new("RGB", (16, 16), (128, 128, 128))
+    frame = pack_planes(img, dither=True)
+    ones = sum(bin(b).count("1") for b in frame.black)
+    assert 0 < ones < 16 * 16
+
+
+def test_magic_calender_save_epaper(example_config, example_json, tmp_path):
+    mcal = mc(example_config)
+    mcal.load(example_json)
+    mcal.draw()
+    frame = mcal.to_epaper()
+    assert any(frame.black) and any(frame.red)
+    mcal.save_epaper(tmp_path / "calender.epd", threshold=128)
+    stride = (example_config.width + 7) // 8
+    assert (tmp_path / "calender.epd").stat().st_size == 2 * stride * example_config.height
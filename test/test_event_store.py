@@ -0,0 +1,134 @@
+import httplib2
+import pytest
+from googleapiclient.errors import HttpError
+
+from magic_calender.event_store import EventStore
+from magic_calender.magic_calender import MagicCalender as mc
+
+from .conftest import FakeRequest, FakeService
+
+TIME_MIN = "2023-12-01T00:00:00Z"
+TIME_MAX = "2023-12-31T23:59:59.999999Z"
+
+
+def _event(uid, summary, day=6, status="confirmed"):
+    return {
+        "id": uid,
+        "status": status,
+        "summary": summary,
+        "start": {"date": f"2023-12-{day:02}"},
+        "end": {"date": f"2023-12-{day + 1:02}"},
+    }
+
+
+class FakeSyncEvents:
+    "Local stand in for events().list with sync token support"
+
+    def __init__(self, per_page=2):
+        self.changes = {"work": [], "home": []}
+        self.expired = set()
+        self.requests = []
+        self._per_page = per_page
+
+    def change(self, calendar_id, event):
+        self.changes[calendar_id].append(event)
+
+    def list(self, calendarId, pageToken=None, syncToken=None, **params):
+        self.requests.append(dict(params, calendarId=calendarId, syncToken=syncToken))
+        if syncToken in self.expired:
+            return FakeRequest(error=HttpError(httplib2.Response({"status": 410}), b"Gone"))
+        log = self.changes[calendarId]
+        if syncToken:
+            items = log[int(syncToken.split(":")[1]) :]
+        else:
+            latest = {}
+            for event in log:
+                latest[event["id"]] = event
+            items = [e for e in latest.values() if e["status"] != "cancelled"]
+        offset = int(pageToken or 0)
+        result = {"items": items[offset : offset + self._per_page]}
+        if offset + self._per_page < len(items):
+            result["nextPageToken"] = str(offset + self._per_page)
+        else:
+            result["nextSyncToken"] = f"{calendarId}:{len(log)}"
+        return FakeRequest(result)
+
+
+class FakeSyncService(FakeService):
+    def __init__(self):
+        super().__init__(latency=0, calendar_ids=["work", "home"])
+        self.events_api = FakeSyncEvents()
+
+    def events(self):
+        return self.events_api
+
+
+@pytest.fixture
+def service():
+    service = FakeSyncService()
+    for i in range(3):
+        service.events_api.change("work", _event(f"w{i}", f"work {i}", 4 + i))
+    service.events_api.change("home", _event("h0", "home 0"))
+    return service
+
+
+def _summaries(events):
+    return sorted(event["summary"] for event in events)
+
+
+def test_event_store_full_then_incremental(example_config, service, tmp_path):
+    store_path = tmp_path / "events.json"
+    mcal = mc(example_config)
+    events = mcal.sync_events(service, EventStore(store_path), TIME_MIN, TIME_MAX)
+    assert _summaries(events) == ["home 0", "work 0", "work 1", "work 2"]
+    assert store_path.is_file()
+    assert all(r["syncToken"] is None and r["timeMin"] == TIME_MIN for r in service.events_api.requests)
+
+    service.events_api.change("work", _event("w1", "work 1 moved", 20))
+    service.events_api.change("work", _event("w2", "", status="cancelled"))
+    service.events_api.change("home", _event("h1", "home 1", 12))
+    service.events_api.requests.clear()
+
+    # a new store instance only knows what was persisted on disk
+    events = mcal.sync_events(service, EventStore(store_path), TIME_MIN, TIME_MAX)
+    assert _summaries(events) == ["home 0", "home 1", "work 0", "work 1 moved"]
+    assert {r["syncToken"] for r in service.events_api.requests} == {"work:3", "home:1"}
+    assert all("timeMin" not in r for r in service.events_api.requests)
+    mcal.load(events)
+
+
+def test_event_store_gone_falls_back_to_full_sync(example_config, service, tmp_path):
+    store = EventStore(tmp_path / "events.json")
+    mcal = mc(example_config)
+    mcal.sync_events(service, store, TIME_MIN, TIME_MAX)
+    service.events_api.change("work", _event("w0", "", status="cancelled"))
+    service.events_api.expired.add("work:3")
+    service.events_api.requests.clear()
+
+    events = mcal.sync_events(service, store, TIME_MIN, TIME_MAX)
+    assert _summaries(events) == ["home 0", "work 1", "work 2"]
+    work_requests = [r for r in service.events_api.requests if r["calendarId"] == "work"]
+    assert work_requests[0]["syncToken"] == "work:3"
+    assert work_requests[-1]["syncToken"] is None
+    assert store.sync_token("work", f"{TIME_MIN}/{TIME_MAX}") == "work:4"
+
+
+def test_event_store_new_window_is_full_sync(tmp_path):
+    store = EventStore(tmp_path / "events.json")
+    store.replace("work", "december", [_event("w0", "work 0")], "work:1")
+    assert store.sync_token("work", "december") == "work:1"
+    assert store.sync_token("work", "january") is None
+    store.retain(["home"])
+    assert store.events() == []
+
+
+def test_event_store_prunes_to_window(example_config, service, tmp_path):
+    store_path = tmp_path / "events.json"
+    mcal = mc(example_config)
+    mcal.sync_events(service, EventStore(store_path), TIME_MIN, TIME_MAX)
+    moved = dict(_event("w0", "work 0"), start={"date": "2024-03-01"}, end={"date": "2024-03-02"})
+    service.events_api.change("work", moved)
+
+    events = mcal.sync_events(service, EventStore(store_path), TIME_MIN, TIME_MAX)
+    assert _summaries(events) == ["home 0", "work 1", "work 2"]
+    assert _summaries(EventStore(store_path).events()) == ["home 0", "work 1", "work 2"]
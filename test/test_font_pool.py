@@ -0,0 +1,35 @@
+from unittest import mock
+
+import magic_calender as mc
+from core.appointment import Appointment
+from magic_calender.fonts import FontPool, FONT_POOL
+
+
+def test_font_pool_shares_variants(example_config):
+    pool = FontPool()
+    font = pool.get(example_config.font, 60)
+    assert pool.get(example_config.font, 60) is font
+    assert pool.get(example_config.font.font_variant(), 60) is font
+    assert pool.get(example_config.font) is example_config.font
+    assert font.size == 60
+    assert pool.stats()["faces"] == 2
+    assert pool.stats()["file_bytes"] > 0
+    pool.clear()
+    assert pool.stats() == {"faces": 0, "file_bytes": 0}
+
+
+def test_font_pool_month_draw_loads_faces_once(
+    example_config, example_grid, example_img, example_json
+):
+    appointments = [Appointment(app) for app in example_json]
+    mm = mc.MagicMonth(example_config, example_grid, appointments)
+    mm.draw(example_config, example_grid, example_img)
+    FONT_POOL.clear()
+    with mock.patch.object(
+        type(example_config.font), "font_variant", autospec=True,
+        side_effect=type(example_config.font).font_variant,
+    ) as font_variant:
+        mm.draw(example_config, example_grid, example_img)
+    # number and header size, the text font is the configured one
+    assert font_variant.call_count == 2
+    assert FONT_POOL.stats()["faces"] == 3
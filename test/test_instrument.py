@@ -0,0 +1,126 @@
+import json
+import logging
+from datetime import date
+from unittest import mock
+
+import pytest
+
+from magic_calender.instrument import (
+    INSTRUMENT,
+    Instrument,
+    JsonFileSink,
+    LogSink,
+    MemorySink,
+    timed,
+)
+from magic_calender.magic_calender import MagicCalender
+from magic_calender.sources import overlaps
+
+from .conftest import FakeRequest
+
+
+@pytest.fixture
+def sink():
+    sink = MemorySink()
+    INSTRUMENT.enable(sink)
+    yield sink
+    INSTRUMENT.disable()
+
+
+def test_disabled_records_nothing(example_config, example_json, tmp_path):
+    assert not INSTRUMENT.enabled
+    cal = MagicCalender(example_config)
+    cal.load(example_json)
+    cal.draw()
+    cal.save(tmp_path / "test.png")
+    assert INSTRUMENT.snapshot() == {"spans": {}, "counters": {}}
+
+
+def test_render_spans_and_counters(sink, example_config, example_json, tmp_path):
+    with mock.patch("magic_calender.magic_calender.date", wraps=date) as mock_date:
+        mock_date.today.return_value = date(2023, 12, 6)
+        cal = MagicCalender(example_config)
+        cal.load(example_json)
+        cal.draw()
+        cal.save(tmp_path / "test.png")
+    MagicCalender._execute(FakeRequest({}))
+    report = INSTRUMENT.flush()
+    assert sink.reports == [report]
+    spans = report["spans"]
+    for name in ("calender.load", "calender.draw", "calender.save"):
+        assert spans[name]["calls"] == 1
+    assert spans["day.draw"]["calls"] == len(cal.month.days)
+    assert spans["appointment.draw"]["calls"] > 0
+    assert spans["calender.draw"]["total_s"] >= spans["day.draw"]["max_s"]
+    counters = report["counters"]
+    in_month = [
+        event for event in example_json if overlaps(event, date(2023, 12, 1), date(2023, 12, 31))
+    ]
+    assert counters["events_loaded"] == len({event["id"] for event in in_month})
+    assert counters["api_calls"] == 1
+    assert counters["text_measurements"] > counters["events_loaded"]
+    assert counters["draw_primitives"] > 0
+    assert INSTRUMENT.snapshot() == {"spans": {}, "counters": {}}
+
+
+def test_draw_primitives_cover_grid_and_base_layer(sink, example_config, example_json):
+    example_config.render_grid = True
+    cal = MagicCalender(example_config)
+    cal.load(example_json)
+    lines = 4 * len(cal._grid._cells)
+    cal.draw()
+    assert INSTRUMENT.flush()["counters"]["draw_primitives"] > lines
+    example_config.cache_base_layer = True
+    cal = MagicCalender(example_config)
+    cal.load(example_json)
+    cal.draw()
+    counters = INSTRUMENT.flush()["counters"]
+    assert counters["draw_primitives"] > lines + len(cal.month.days)
+
+
+def test_timed_keeps_function():
+    instrument = Instrument()
+
+    @timed("double")
+    def double(value):
+        "Doubles"
+        return 2 * value
+
+    assert double(2) == 4
+    assert double.__doc__ == "Doubles"
+    assert instrument.span("unused").__enter__() is None
+
+
+def test_json_file_sink(tmp_path):
+    instrument = Instrument()
+    instrument.enable(JsonFileSink(tmp_path / "metrics.jsonl"))
+    instrument.count("api_calls", 3)
+    with instrument.span("fetch"):
+        pass
+    instrument.flush()
+    instrument.flush()
+    lines = (tmp_path / "metrics.jsonl").read_text().splitlines()
+    first, second = (json.loads(line) for line in lines)
+    assert first["counters"] == {"api_calls": 3}
+    assert first["spans"]["fetch"]["calls"] == 1
+    assert second["counters"] == {} and second["spans"] == {}
+
+
+def test_log_sink(caplog):
+    instrument = Instrument()
+    instrument.enable(LogSink())
+    instrument.count("events_fetched", 2)
+    with caplog.at_level(logging.INFO, logger="magic_calender"):
+        instrument.flush()
+    assert '"events_fetched": 2' in caplog.text
+
+
+def test_main_metrics(example_json, tmp_path, monkeypatch):
+    from magic_calender.__main__ import main
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "events.json").write_text(json.dumps(example_json))
+    main(["--events", "events.json", "--metrics", "metrics.jsonl"])
+    (line,) = (tmp_path / "metrics.jsonl").read_text().splitlines()
+    assert json.loads(line)["spans"]["calender.draw"]["calls"] == 1
+    assert not INSTRUMENT.enabled
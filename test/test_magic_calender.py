@@ -1,7 +1,17 @@
+import copy
+import json
+from datetime import date
+from unittest import mock
+
 import pytest
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpMockSequence
+from PIL import ImageChops
 
 from magic_calender.magic_calender import MagicCalender as mc
 
+from .conftest import FakeService
+
 def test_magic_calender_load(example_config):
     mcal = mc(example_config)
     with pytest.raises(RuntimeError):
@@ -21,3 +31,136 @@ def test_magic_calender_save_to_file(example_config, example_json, tmp_path):
     mcal.draw()
     mcal.save(tmp_path / (file := "calender.png"))
     print(tmp_path / file)
+
+
+def test_magic_calender_fetch_events_paginated(example_config):
+    example_config.fetch_concurrency = 4
+    service = FakeService()
+    mcal = mc(example_config)
+    events = mcal.fetch_events(service, "2023-12-01T00:00:00Z", "2023-12-31T23:59:59Z")
+    assert len(events) == 6 * 3 * 4
+    assert len({event["id"] for event in events}) == len(events)
+    assert [event["id"] for event in events][:4] == [f"cal0-0-{i}" for i in range(4)]
+    assert service.max_in_flight > 1
+    assert service.max_in_flight <= example_config.fetch_concurrency
+    mcal.load(events)
+
+
+def test_magic_calender_fetch_events_sequential(example_config):
+    example_config.fetch_concurrency = 1
+    service = FakeService(latency=0.01)
+    events = mc(example_config).fetch_events(service, "2023-12-01T00:00:00Z", "2023-12-31T23:59:59Z")
+    assert len(events) == 6 * 3 * 4
+    assert service.max_in_flight == 1
+
+
+def _render(config, events):
+    mcal = mc(config)
+    mcal.load(events)
+    mcal.draw()
+    return mcal
+
+
+def _changed_events(example_json):
+    events = copy.deepcopy(example_json)
+    events[4]["summary"] = "Renamed event"
+    events.append(
+        {
+            "id": "new-event",
+            "summary": "Added event",
+            "start": {"dateTime": "2023-12-20T10:00:00Z"},
+            "end": {"dateTime": "2023-12-20T11:00:00Z"},
+        }
+    )
+    return events
+
+
+def test_magic_calender_draw_incremental(example_config, example_json):
+    with mock.patch("magic_calender.magic_calender.date", wraps=date) as mock_date:
+        mock_date.today.return_value = date(2023, 12, 6)
+        mcal = _render(example_config, example_json)
+        before = mcal._img.copy()
+        assert mcal.draw_incremental() == (mcal._img, [])
+
+        events = _changed_events(example_json)
+        mcal.load(events)
+        img, dirty = mcal.draw_incremental()
+        expected = _render(example_config, events)._img
+
+    assert img.tobytes() == expected.tobytes()
+    assert 0 < len(dirty) < 5
+    assert sum(box.width for box in dirty) < 3 * example_config.width
+    changed = ImageChops.difference(before, img).getbbox()
+    assert changed
+    assert all(
+        any(box.p_start.x <= x <= box.p_end.x and box.p_start.y <= y <= box.p_end.y for box in dirty)
+        for x, y in ((changed[0], changed[1]), (changed[2] - 1, changed[3] - 1))
+    )
+
+
+def test_magic_calender_draw_incremental_today(example_config, example_json):
+    with mock.patch("magic_calender.magic_calender.date", wraps=date) as mock_date:
+        mock_date.today.return_value = date(2023, 12, 6)
+        mcal = _render(example_config, example_json)
+        mock_date.today.return_value = date(2023, 12, 7)
+        img, dirty = mcal.draw_incremental()
+        expected = _render(example_config, example_json)._img
+    assert img.tobytes() == expected.tobytes()
+    assert dirty
+
+
+def test_magic_calender_draw_incremental_overlapping(example_config, example_json):
+    spanning = {
+        "id": "trip",
+        "summary": "A long trip with a summary wider than a single day cell",
+        "start": {"date": "2023-12-12"},
+        "end": {"date": "2023-12-16"},
+    }
+    below = {
+        "id": "below",
+        "summary": "Meeting",
+        "start": {"dateTime": "2023-12-13T10:00:00Z"},
+        "end": {"dateTime": "2023-12-13T11:00:00Z"},
+    }
+    with mock.patch("magic_calender.magic_calender.date", wraps=date) as mock_date:
+        mock_date.today.return_value = date(2023, 12, 6)
+        mcal = _render(example_config, example_json + [spanning, below])
+        assert len(mcal._states[12].cells) > 1
+
+        events = example_json + [spanning, dict(below, summary="Moved meeting")]
+        mcal.load(events)
+        img, dirty = mcal.draw_incremental()
+        expected = _render(example_config, events)._img
+    assert img.tobytes() == expected.tobytes()
+    assert len(dirty) == 1
+
+
+def test_magic_calender_requests_field_mask(example_config):
+    service = FakeService(calendars=1, pages=1, latency=0)
+    mc(example_config).fetch_events(service, "2023-12-01T00:00:00Z", "2023-12-31T23:59:59Z")
+    assert service.list_params["fields"] == "nextPageToken,items(id)"
+    assert service.event_params["fields"] == mc.event_fields()
+    for field in ("id", "summary", "start", "end", "status"):
+        assert field in mc.event_fields()
+
+
+class RecordingHttp(HttpMockSequence):
+    def request(self, uri, method="GET", body=None, headers=None, **kwargs):
+        self.sent = getattr(self, "sent", []) + [(uri, headers)]
+        return super().request(uri, method, body, headers, **kwargs)
+
+
+def test_magic_calender_partial_gzip_requests(example_config, example_json):
+    example_config.fetch_concurrency = 1
+    http = RecordingHttp(
+        [
+            ({"status": "200"}, json.dumps({"items": [{"id": "work"}]})),
+            ({"status": "200"}, json.dumps({"items": example_json[:2]})),
+        ]
+    )
+    service = build("calendar", "v3", http=http, static_discovery=True)
+    events = mc(example_config).fetch_events(service, "2023-12-01T00:00:00Z", "2023-12-31T23:59:59Z")
+    assert events == example_json[:2]
+    for uri, headers in http.sent:
+        assert "fields=" in uri
+        assert "gzip" in headers["accept-encoding"] and "gzip" in headers["user-agent"]
@@ -1,3 +1,9 @@
+import json
+from io import BytesIO
+from unittest import mock
+
+from PIL import ImageFont
+
 import magic_calender as mc
 from core.appointment import Appointment
 
@@ -20,3 +26,53 @@ def test_magic_month_head_text(example_config, example_grid, example_json):
     mm = mc.MagicMonth(example_config, example_grid, appointments)
     assert 108 == mm._get_header_text_size(example_config)
     assert len(mm.days) == 31
+
+
+def test_magic_month_head_text_cached(example_config, example_grid, tmp_path):
+    example_config.cache_dir = tmp_path
+    mm = mc.MagicMonth(example_config, example_grid, [])
+    mc.MagicMonth._header_sizes.clear()
+    size = mm._search_header_text_size(example_config)
+    assert mm._get_header_text_size(example_config) == size
+    assert (tmp_path / mc.HEADER_SIZES_FILE).is_file()
+    mc.MagicMonth._header_sizes.clear()
+    with mock.patch.object(mc.MagicMonth, "_search_header_text_size") as search:
+        assert mm._get_header_text_size(example_config) == size
+        assert mm._get_header_text_size(example_config) == size
+    search.assert_not_called()
+
+
+def test_magic_month_head_text_broken_cache(example_config, example_grid, tmp_path):
+    example_config.cache_dir = tmp_path
+    (tmp_path / mc.HEADER_SIZES_FILE).write_text('{"truncated": ')
+    mm = mc.MagicMonth(example_config, example_grid, [])
+    mc.MagicMonth._header_sizes.clear()
+    size = mm._get_header_text_size(example_config)
+    assert size == mm._search_header_text_size(example_config)
+    with (tmp_path / mc.HEADER_SIZES_FILE).open("r") as file:
+        assert list(json.load(file).values()) == [size]
+    assert list(tmp_path.glob("*.tmp")) == []
+
+
+def test_magic_month_layout_follows_config(example_config, example_grid, example_json):
+    appointments = [Appointment(app) for app in example_json]
+    mm = mc.MagicMonth(example_config, example_grid, appointments)
+    layout = mm.layout(example_config, example_grid)
+    assert mm.layout(example_config, example_grid) is layout
+    # configs are changed in place by the daemon and the tests
+    example_config.appointment_spacing_px += 4
+    changed = mm.layout(example_config, example_grid)
+    assert changed is not layout
+    assert mm.layout(example_config, example_grid) is changed
+    example_config.font = example_config.font.font_variant()
+    assert mm.layout(example_config, example_grid) is not changed
+
+
+def test_magic_month_head_text_font_from_bytes(example_config, example_grid, tmp_path):
+    example_config.cache_dir = tmp_path
+    with open(example_config.font.path, "rb") as file:
+        example_config.font = ImageFont.truetype(BytesIO(file.read()), example_config.font.size)
+    mm = mc.MagicMonth(example_config, example_grid, [])
+    mc.MagicMonth._header_sizes.clear()
+    assert mm._get_header_text_size(example_config) > 0
+    assert not (tmp_path / mc.HEADER_SIZES_FILE).exists()
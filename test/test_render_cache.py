@@ -0,0 +1,117 @@
+import copy
+import os
+from dataclasses import replace
+from datetime import date
+from io import BytesIO
+from unittest import mock
+
+import pytest
+from PIL import ImageFont
+
+from magic_calender.magic_calender import MagicCalender as mc
+from magic_calender.render_cache import RenderCache
+
+
+@pytest.fixture
+def cached_config(example_config, tmp_path):
+    example_config.cache_dir = tmp_path / "cache"
+    example_config.cache_renders = True
+    with mock.patch("magic_calender.magic_calender.date", wraps=date) as mock_date:
+        mock_date.today.return_value = date(2023, 12, 6)
+        yield example_config
+
+
+def _render(config, events, filepath=None):
+    mcal = mc(config)
+    mcal.load(events)
+    return mcal.render(filepath)
+
+
+def test_render_cache_hit(cached_config, example_json, tmp_path):
+    first = _render(cached_config, example_json, tmp_path / "first.png")
+    assert not first.hit
+    with mock.patch.object(mc, "draw") as draw, mock.patch.object(mc, "save") as save:
+        second = _render(cached_config, example_json, tmp_path / "second.png")
+    assert second.hit
+    draw.assert_not_called()
+    save.assert_not_called()
+    assert second.path.read_bytes() == first.path.read_bytes()
+
+
+
+def test_render_cache_hit_then_save(cached_config, example_json, tmp_path):
+    first = _render(cached_config, example_json, tmp_path / "first.png")
+    mcal = mc(cached_config)
+    mcal.load(example_json)
+    assert mcal.render().hit
+    # the instance has to match the render it returned
+    assert mcal.to_bytes() == first.path.read_bytes()
+    mcal.save(tmp_path / "saved.png")
+    assert (tmp_path / "saved.png").read_bytes() == first.path.read_bytes()
+    mcal = mc(cached_config)
+    mcal.load(example_json)
+    mcal.render()
+    img, dirty = mcal.draw_incremental()
+    assert dirty and mcal.to_bytes() == first.path.read_bytes()
+
+def test_render_cache_without_filepath(cached_config, example_json):
+    first = _render(cached_config, example_json)
+    second = _render(cached_config, example_json)
+    assert (first.hit, second.hit) == (False, True)
+    assert first.path == second.path
+    assert first.path.parent == cached_config.cache_dir
+
+
+def test_render_cache_disabled(example_config, example_json, tmp_path):
+    assert not _render(example_config, example_json, tmp_path / "a.png").hit
+    assert not _render(example_config, example_json, tmp_path / "a.png").hit
+    assert (tmp_path / "a.png").is_file()
+
+
+
+def test_render_cache_font_from_bytes(cached_config, example_json, tmp_path):
+    with open(cached_config.font.path, "rb") as file:
+        cached_config.font = ImageFont.truetype(BytesIO(file.read()), cached_config.font.size)
+    assert not _render(cached_config, example_json, tmp_path / "a.png").hit
+    assert not _render(cached_config, example_json, tmp_path / "a.png").hit
+    assert (tmp_path / "a.png").is_file()
+    assert not cached_config.cache_dir.exists() or not list(cached_config.cache_dir.glob("render-*"))
+
+def test_render_key(cached_config, example_json):
+    def key(config=cached_config, events=example_json):
+        mcal = mc(config)
+        mcal.load(events)
+        return mcal.render_key()
+
+    base = key()
+    assert key() == base
+    assert key(replace(cached_config, fetch_concurrency=9, refresh_interval_s=1)) == base
+    assert key(replace(cached_config, appointment_spacing_px=11)) != base
+    changed = copy.deepcopy(example_json)
+    changed[0]["summary"] += "!"
+    assert key(events=changed) != base
+    # outside of the month, so not drawn
+    outside = example_json + [
+        {"id": "jan", "summary": "Later", "start": {"date": "2024-01-10"}, "end": {"date": "2024-01-11"}}
+    ]
+    assert key(events=outside) == base
+    with mock.patch("magic_calender.magic_calender.date", wraps=date) as mock_date:
+        mock_date.today.return_value = date(2023, 12, 7)
+        assert key() != base
+
+
+def test_render_cache_eviction(tmp_path):
+    cache = RenderCache(tmp_path, max_bytes=250)
+    for i, key in enumerate("abc"):
+        source = tmp_path / f"{key}.tmp"
+        source.write_bytes(b"x" * 100)
+        cache.put(key, source)
+        os.utime(cache.path(key), (i, i))
+    assert cache.get("a") is None
+    assert cache.get("b") is not None and cache.get("c") is not None
+    assert cache.size() == 200
+    # a render larger than the whole cache is still kept until the next one
+    source = tmp_path / "big.tmp"
+    source.write_bytes(b"x" * 1000)
+    assert cache.put("big", source).is_file()
+    assert cache.get("b") is None
@@ -0,0 +1,122 @@
+import threading
+import time
+from datetime import date, datetime
+from http.client import HTTPConnection
+from io import BytesIO
+from unittest import mock
+
+import pytest
+from PIL import Image
+
+from magic_calender.magic_calender import MagicCalender
+from magic_calender.server import etag_matches, make_server
+
+
+@pytest.fixture
+def server(example_config, example_json):
+    example_config.serve_max_age_s = 60
+    events = list(example_json)
+    with mock.patch("magic_calender.magic_calender.date", wraps=date) as mock_date:
+        mock_date.today.return_value = date(2023, 12, 6)
+        server = make_server(example_config, port=0, events=lambda: events)
+        server.service._now = lambda: datetime(2023, 12, 6, 12, 0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        yield server
+        server.shutdown()
+        server.server_close()
+
+
+def _get(server, path, headers=None, method="GET"):
+    connection = HTTPConnection(*server.server_address, timeout=10)
+    connection.request(method, path, headers=headers or {})
+    response = connection.getresponse()
+    body = response.read()
+    connection.close()
+    return response, body
+
+
+def test_serve_png(server, example_config):
+    response, body = _get(server, "/calender.png")
+    assert response.status == 200
+    assert response.getheader("Content-Type") == "image/png"
+    assert int(response.getheader("Content-Length")) == len(body)
+    with Image.open(BytesIO(body)) as img:
+        assert img.size == (example_config.width, example_config.height)
+
+
+@pytest.mark.parametrize("profile", ["raw", "png-palette"])
+def test_serve_png_with_encode_profile(server, example_config, profile):
+    example_config.encode_profile = profile
+    response, body = _get(server, "/calender.png")
+    assert response.getheader("Content-Type") == "image/png"
+    with Image.open(BytesIO(body)) as img:
+        assert img.format == "PNG"
+        assert img.size == (example_config.width, example_config.height)
+
+
+def test_serve_epaper(server, example_config):
+    response, body = _get(server, "/calender.epd")
+    assert response.status == 200
+    assert len(body) == 2 * ((example_config.width + 7) // 8) * example_config.height
+
+
+def test_conditional_get(server):
+    response, _ = _get(server, "/calender.png")
+    tag = response.getheader("ETag")
+    assert tag.startswith('"') and tag.endswith('"')
+    response, body = _get(server, "/calender.png", {"If-None-Match": tag})
+    assert response.status == 304 and body == b""
+    assert response.getheader("ETag") == tag
+    response, _ = _get(server, "/calender.png", {"If-None-Match": '"other"'})
+    assert response.status == 200
+    response, body = _get(server, "/calender.png", method="HEAD")
+    assert response.status == 200 and body == b""
+
+
+def test_unknown_path(server):
+    response, _ = _get(server, "/secrets")
+    assert response.status == 404
+
+
+def test_requests_coalesce(server):
+    load = MagicCalender.load
+
+    def slow_load(self, events=None):
+        time.sleep(0.2)
+        load(self, events)
+
+    results = []
+    with mock.patch.object(MagicCalender, "load", slow_load):
+        threads = [
+            threading.Thread(target=lambda: results.append(_get(server, "/calender.png")))
+            for _ in range(8)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    assert [response.status for response, _ in results] == [200] * 8
+    assert len({body for _, body in results}) == 1
+    assert server.service.renders == 1
+
+
+def test_rerender_keeps_etag(server, example_config):
+    clock = [0.0]
+    server.service._clock = lambda: clock[0]
+    response, _ = _get(server, "/calender.png")
+    tag = response.getheader("ETag")
+    clock[0] += example_config.serve_max_age_s + 1
+    with mock.patch.object(MagicCalender, "to_bytes") as to_bytes:
+        response, _ = _get(server, "/calender.png", {"If-None-Match": tag})
+    assert response.status == 304
+    # nothing changed, the encoded image is reused
+    to_bytes.assert_not_called()
+    assert server.service.renders == 2
+
+
+def test_etag_matches():
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"a"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"a"')
@@ -0,0 +1,238 @@
+import json
+from datetime import date, datetime
+
+import pytest
+import pytz
+
+from magic_calender.magic_calender import MagicCalender as mc
+from magic_calender.sources import (
+    EventSource,
+    IcsSource,
+    JsonLinesSource,
+    JsonSource,
+    source_for,
+)
+
+DECEMBER = (date(2023, 12, 1), date(2023, 12, 31))
+
+FEED = "\r\n".join(
+    [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "BEGIN:VEVENT",
+        "UID:utc",
+        "DTSTART:20231206T100000Z",
+        "DTEND:20231206T110000Z",
+        "SUMMARY:Standup",
+        "BEGIN:VALARM",
+        "ACTION:DISPLAY",
+        "SUMMARY:Not the summary",
+        "TRIGGER:-PT10M",
+        "END:VALARM",
+        "END:VEVENT",
+        "BEGIN:VEVENT",
+        "UID:berlin",
+        'DTSTART;TZID="Europe/Berlin":20231207T090000',
+        "DURATION:PT1H30M",
+        "SUMMARY:Review\\, with a very long summary that an export folds over",
+        "  two lines",
+        "END:VEVENT",
+        "BEGIN:VEVENT",
+        "UID:trip",
+        "DTSTART;VALUE=DATE:20231213",
+        "DTEND;VALUE=DATE:20231216",
+        "SUMMARY:Trip",
+        "END:VEVENT",
+        "BEGIN:VEVENT",
+        "UID:cancelled",
+        "STATUS:CANCELLED",
+        "DTSTART:20231208T100000Z",
+        "DTEND:20231208T110000Z",
+        "SUMMARY:Gone",
+        "END:VEVENT",
+        "BEGIN:VEVENT",
+        "UID:history",
+        "DTSTART:20190301T100000Z",
+        "DTEND:20190301T110000Z",
+        "SUMMARY:Long ago",
+        "END:VEVENT",
+        "BEGIN:VEVENT",
+        "UID:moved",
+        "RECURRENCE-ID:20231211T100000Z",
+        "DTSTART:20231212T100000Z",
+        "DTEND:20231212T110000Z",
+        "SUMMARY:Moved",
+        "END:VEVENT",
+        "BEGIN:VEVENT",
+        "UID:birthday",
+        "DTSTART;VALUE=DATE:20231220",
+        "SUMMARY:Birthday",
+        "END:VEVENT",
+        "END:VCALENDAR",
+        "",
+    ]
+)
+
+
+def test_ics_source(tmp_path):
+    path = tmp_path / "feed.ics"
+    path.write_text(FEED, newline="")
+    events = {event["id"]: event for event in IcsSource(path).events(*DECEMBER)}
+    assert set(events) == {"utc", "berlin", "trip", "moved_20231211T100000Z", "birthday"}
+    assert events["utc"]["summary"] == "Standup"
+    assert events["utc"]["start"] == {"dateTime": "2023-12-06T10:00:00Z"}
+    assert events["berlin"]["summary"] == (
+        "Review, with a very long summary that an export folds over two lines"
+    )
+    assert events["berlin"]["start"] == {"dateTime": "2023-12-07T09:00:00+01:00"}
+    assert events["berlin"]["end"] == {"dateTime": "2023-12-07T10:30:00+01:00"}
+    assert events["trip"]["end"] == {"date": "2023-12-16"}
+    assert events["birthday"]["end"] == {"date": "2023-12-21"}
+
+
+RECURRING = "\r\n".join(
+    [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        # moved occurrences may come before their series
+        "BEGIN:VEVENT",
+        "UID:standup",
+        "RECURRENCE-ID;TZID=Europe/Berlin:20231213T090000",
+        "DTSTART;TZID=Europe/Berlin:20231214T100000",
+        "DTEND;TZID=Europe/Berlin:20231214T101500",
+        "SUMMARY:Standup moved",
+        "END:VEVENT",
+        "BEGIN:VEVENT",
+        "UID:standup",
+        "DTSTART;TZID=Europe/Berlin:20190703T090000",
+        "DTEND;TZID=Europe/Berlin:20190703T091500",
+        "RRULE:FREQ=WEEKLY;BYDAY=WE",
+        "EXDATE;TZID=Europe/Berlin:20231220T090000",
+        "SUMMARY:Standup",
+        "END:VEVENT",
+        "BEGIN:VEVENT",
+        "UID:birthday",
+        "DTSTART;VALUE=DATE:19901224",
+        "DTEND;VALUE=DATE:19901225",
+        "RRULE:FREQ=YEARLY",
+        "SUMMARY:Birthday",
+        "END:VEVENT",
+        "BEGIN:VEVENT",
+        "UID:ended",
+        "DTSTART:20190101T080000Z",
+        "DTEND:20190101T090000Z",
+        "RRULE:FREQ=DAILY;UNTIL=20190110T080000Z",
+        "SUMMARY:Ended",
+        "END:VEVENT",
+        "BEGIN:VEVENT",
+        "UID:extra",
+        "DTSTART:20231101T150000Z",
+        "DTEND:20231101T160000Z",
+        "RDATE:20231211T150000Z,20231218T150000Z",
+        "SUMMARY:Extra",
+        "END:VEVENT",
+        "BEGIN:VEVENT",
+        "UID:daily",
+        "DTSTART:20231201T070000Z",
+        "DTEND:20231201T073000Z",
+        "RRULE:FREQ=DAILY;COUNT=3",
+        "SUMMARY:Daily",
+        "END:VEVENT",
+        "BEGIN:VEVENT",
+        "UID:daily",
+        "RECURRENCE-ID:20231202T070000Z",
+        "STATUS:CANCELLED",
+        "DTSTART:20231202T070000Z",
+        "DTEND:20231202T073000Z",
+        "END:VEVENT",
+        "END:VCALENDAR",
+        "",
+    ]
+)
+
+
+def test_ics_recurring(tmp_path):
+    path = tmp_path / "recurring.ics"
+    path.write_text(RECURRING, newline="")
+    events = {event["id"]: event for event in IcsSource(path).events(*DECEMBER)}
+    assert set(events) == {
+        "standup_20231206T080000Z",
+        "standup_20231213T080000Z",
+        "standup_20231227T080000Z",
+        "birthday_20231224",
+        "extra_20231211T150000Z",
+        "extra_20231218T150000Z",
+        "daily_20231201T070000Z",
+        "daily_20231203T070000Z",
+    }
+    # started in summer time, still at nine in the winter
+    assert events["standup_20231206T080000Z"]["start"] == {"dateTime": "2023-12-06T09:00:00+01:00"}
+    assert events["standup_20231206T080000Z"]["end"] == {"dateTime": "2023-12-06T09:15:00+01:00"}
+    moved = events["standup_20231213T080000Z"]
+    assert moved["summary"] == "Standup moved"
+    assert moved["start"] == {"dateTime": "2023-12-14T10:00:00+01:00"}
+    assert events["birthday_20231224"]["start"] == {"date": "2023-12-24"}
+    assert events["birthday_20231224"]["end"] == {"date": "2023-12-25"}
+    assert events["daily_20231203T070000Z"]["start"] == {"dateTime": "2023-12-03T07:00:00Z"}
+
+
+def test_ics_moved_away(tmp_path):
+    path = tmp_path / "recurring.ics"
+    path.write_text(RECURRING.replace("20231214T10", "20240214T10"), newline="")
+    ids = {event["id"] for event in IcsSource(path).events(*DECEMBER)}
+    assert "standup_20231213T080000Z" not in ids
+    assert "standup_20231206T080000Z" in ids
+
+def test_load_from_ics(example_config, tmp_path):
+    path = tmp_path / "feed.ics"
+    path.write_text(FEED, newline="")
+    mcal = mc(example_config)
+    mcal.load(IcsSource(path))
+    by_id = {app.id: app for app in mcal._appointments}
+    assert by_id["berlin"].start == datetime(2023, 12, 7, 8, 0, tzinfo=pytz.UTC)
+    assert by_id["trip"].multiday
+
+
+def test_empty_ics(tmp_path):
+    path = tmp_path / "empty.ics"
+    path.write_bytes(b"")
+    assert list(IcsSource(path).events(*DECEMBER)) == []
+
+
+def test_json_lines_source(tmp_path, example_json):
+    path = tmp_path / "events.jsonl"
+    path.write_text("\n".join(json.dumps(event) for event in example_json) + "\n\n")
+    events = list(JsonLinesSource(path).events(*DECEMBER))
+    assert events and all(event in example_json for event in events)
+    assert len(events) < len(example_json)
+
+
+def test_json_source_page(tmp_path, example_json):
+    path = tmp_path / "page.json"
+    path.write_text(json.dumps({"items": example_json}))
+    assert list(JsonSource(path).events(*DECEMBER)) == list(
+        source_for(tmp_path / "page.json").events(*DECEMBER)
+    )
+    assert isinstance(source_for(tmp_path / "feed.ICS"), IcsSource)
+    assert isinstance(source_for(tmp_path / "events.jsonl"), JsonLinesSource)
+
+
+def test_load_from_custom_source(example_config, example_json):
+    pulled = []
+
+    class Counting(EventSource):
+        def events(self, first, last):
+            assert (first, last) == DECEMBER
+            for event in example_json:
+                pulled.append(event["id"])
+                yield event
+
+    mcal = mc(example_config)
+    mcal.load(Counting())
+    assert pulled == [event["id"] for event in example_json]
+    assert len(mcal._appointments) == len({event["id"] for event in example_json})
+
+
+def test_event_source_is_abstract():
+    with pytest.raises(TypeError):
+        EventSource()
@@ -0,0 +1,63 @@
+import json
+import subprocess
+import sys
+from datetime import date
+from pathlib import Path
+from unittest import mock
+
+from magic_calender.config import CalConfig, default_font
+
+# generous for CI, a cold import is about 20ms on a laptop
+IMPORT_BUDGET_S = 0.5
+
+GOOGLE_MODULES = ("googleapiclient", "google_auth_oauthlib", "google.oauth2", "httplib2")
+
+IMPORT_SCRIPT = f"""
+import json, sys, time
+start = time.perf_counter()
+import magic_calender
+elapsed = time.perf_counter() - start
+from magic_calender.config import default_font
+print(json.dumps({{
+    "elapsed": elapsed,
+    "google": [m for m in {GOOGLE_MODULES!r} if m in sys.modules],
+    "fonts": default_font.cache_info().currsize,
+}}))
+"""
+
+
+def test_import_budget():
+    result = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT],
+        cwd=Path(__file__).parents[1],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    report = json.loads(result.stdout)
+    assert report["google"] == []
+    assert report["fonts"] == 0
+    assert report["elapsed"] < IMPORT_BUDGET_S
+
+
+def test_config_font_is_lazy():
+    default_font.cache_clear()
+    with mock.patch("magic_calender.config.ImageFont.truetype") as truetype:
+        config = CalConfig()
+        truetype.assert_not_called()
+        assert config.font is truetype.return_value
+        assert CalConfig().font is config.font
+        truetype.assert_called_once()
+    default_font.cache_clear()
+
+
+def test_config_font_given():
+    font = default_font()
+    assert CalConfig(font=font).font is font
+
+
+def test_config_month_is_evaluated_per_instance():
+    with mock.patch("magic_calender.config.date") as fake_date:
+        fake_date.today.return_value = date(2031, 7, 4)
+        config = CalConfig()
+    assert (config.year, config.month) == (2031, 7)